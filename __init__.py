@@ -1,22 +1,71 @@
 # In /custom_components/ilmaprognoos/__init__.py
 
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.const import Platform
+from homeassistant.exceptions import ConfigEntryNotReady, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.setup import async_setup_component
 
-from .const import DOMAIN
-from .coordinator import IlmaprognoosDataUpdateCoordinator
+from .const import (
+    DOMAIN, LOGGER, DATA_OBSERVATIONS, DATA_FORECAST_CACHE, DATA_PROCESSING, DATA_HUB_METRIC_SENSORS, SERVICE_GET_WARNINGS, ATTR_CONFIG_ENTRY,
+    CONF_FLEET, CONF_LOCATIONS
+)
+from .coordinator import IlmaprognoosDataUpdateCoordinator, async_remove_stored_payloads
+from .fleet import IlmaprognoosFleet, async_remove_locations, fleet_location_ids
 
 PLATFORMS = [Platform.WEATHER, Platform.SENSOR, Platform.BINARY_SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+GET_WARNINGS_SCHEMA = vol.Schema({vol.Optional(ATTR_CONFIG_ENTRY): cv.string})
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """Register the integration services."""
+
+    async def async_get_warnings(call: ServiceCall) -> ServiceResponse:
+        """Return the full warning payloads per location; the warnings sensor does not record them.
+
+        Fleet locations are keyed by their location id, which starts with the fleet's entry id.
+        """
+        entries = {}
+        for entry_id, value in hass.data.get(DOMAIN, {}).items():
+            if isinstance(value, IlmaprognoosDataUpdateCoordinator): entries[entry_id] = {entry_id: value}
+            elif isinstance(value, IlmaprognoosFleet): entries[entry_id] = value.coordinators
+        if entry_id := call.data.get(ATTR_CONFIG_ENTRY):
+            if entry_id not in entries:
+                raise ServiceValidationError(f"Ilmaprognoosi asukohta ei leitud: {entry_id}")
+            entries = {entry_id: entries[entry_id]}
+        return {
+            location_id: {
+                "location": coordinator.location_name,
+                "warnings": (coordinator.data or {}).get("warnings", []),
+            }
+            for coordinators in entries.values()
+            for location_id, coordinator in coordinators.items()
+        }
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_WARNINGS, async_get_warnings,
+        schema=GET_WARNINGS_SCHEMA, supports_response=SupportsResponse.ONLY,
+    )
+    return True
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Ilmaprognoos from a config entry."""
     # --- NEW: Ensure the sun component is loaded ---
     await async_setup_component(hass, "sun", {})
 
+    if entry.data.get(CONF_FLEET):
+        return await _async_setup_fleet(hass, entry)
+
     coordinator = IlmaprognoosDataUpdateCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    if await coordinator.async_restore():
+        # Entities start from the stored payloads, so startup does not wait for ilmateenistus.ee
+        entry.async_create_background_task(hass, coordinator.async_refresh(), f"{DOMAIN}_refresh_{entry.entry_id}")
+    else:
+        await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
     entry.async_on_unload(entry.add_update_listener(update_listener))
@@ -24,14 +73,60 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
+async def _async_setup_fleet(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up a fleet entry: restore every location, fetch the ones with nothing stored, then start the scheduler.
+
+    Locations that get no data stay unavailable until a later round fetches
+    it; only a fleet where no location has data is not ready.
+    """
+    fleet = IlmaprognoosFleet(hass, entry)
+    entry.async_on_unload(fleet.async_shutdown)
+    missing = await fleet.async_restore()
+    if missing:
+        await fleet.async_refresh(missing)
+        failed = [coordinator.location_name for coordinator in missing if coordinator.data is None]
+        if len(failed) == len(fleet.coordinators):
+            raise ConfigEntryNotReady(f"Asukohtade andmeid ei saadud: {', '.join(failed)}")
+        if failed:
+            LOGGER.warning(f"{fleet.name}: no data for {', '.join(failed)} yet, retrying with the next rounds")
+    # Restored locations are refreshed in the background, like a single entry's
+    entry.async_create_background_task(hass, fleet.async_refresh(), f"{DOMAIN}_refresh_{entry.entry_id}")
+
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = fleet
+    entry.async_on_unload(entry.add_update_listener(update_listener))
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    return True
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        # Drop the shared observations hub and processing slots together with the last entry
+        if set(hass.data[DOMAIN]) <= {DATA_OBSERVATIONS, DATA_FORECAST_CACHE, DATA_PROCESSING, DATA_HUB_METRIC_SENSORS}:
+            hass.data.pop(DOMAIN)
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored payloads of a removed entry."""
+    if entry.data.get(CONF_FLEET):
+        for location_id in fleet_location_ids(entry):
+            await async_remove_stored_payloads(hass, location_id)
+        return
+    await async_remove_stored_payloads(hass, entry.entry_id)
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle options update."""
+    if entry.data.get(CONF_FLEET):
+        fleet: IlmaprognoosFleet = hass.data[DOMAIN][entry.entry_id]
+        if entry.options.get(CONF_LOCATIONS, []) == fleet.locations:
+            await fleet.async_update_options()
+            return
+        # Added, removed or changed locations change the entities, so the fleet is set up again
+        removed = set(fleet.coordinators) - fleet_location_ids(entry)
+        await hass.config_entries.async_reload(entry.entry_id)
+        await async_remove_locations(hass, removed)
+        return
     coordinator: IlmaprognoosDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
     await coordinator.async_update_intervals()
\ No newline at end of file
@@ -0,0 +1,198 @@
+# In /custom_components/ilmaprognoos/api.py
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+
+from aiohttp import ClientResponseError, ClientSession
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    HEADERS, FETCH_TIMEOUT, CIRCUIT_FAILURE_THRESHOLD, BACKOFF_BASE, BACKOFF_MAX
+)
+
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    # aiohttp can only decode br when the brotli package is installed
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of a request while the endpoint's circuit breaker is open."""
+
+
+def _retry_after(value: str | None, now: datetime) -> timedelta | None:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value: return None
+    try: return timedelta(seconds=max(int(value), 0))
+    except ValueError: pass
+    try: return max(parsedate_to_datetime(value) - now, timedelta())
+    except (TypeError, ValueError): return None
+
+
+class IlmaprognoosEndpoint:
+    """An upstream URL fetched with conditional GET and compressed transfer.
+
+    The ETag/Last-Modified validators of the last full response are sent
+    back on the next request, so an unchanged document costs a bodyless 304.
+    Transfer statistics are kept for the status sensor.
+
+    Each endpoint has a circuit breaker. After CIRCUIT_FAILURE_THRESHOLD
+    consecutive failures, or when the server sends Retry-After, it opens. It
+    stays open for an exponential back-off with jitter, or for the requested
+    Retry-After if that is longer. While open, requests fail at once with
+    CircuitOpenError. Once the back-off has passed, a single probe request is
+    let through (half-open). It closes the breaker on success and reopens it
+    with a longer back-off on failure.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.etag = None
+        self.last_modified = None
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_received = 0
+        self.bytes_saved = 0
+        self._last_wire_size = 0
+        # Bytes on the wire of the latest response, 0 for a 304
+        self.last_response_bytes = 0
+        self.circuit = CIRCUIT_CLOSED
+        self.failures = 0
+        self.retry_at = None
+
+    def reset_validators(self) -> None:
+        """Force the next request to download the full document."""
+        self.etag = None
+        self.last_modified = None
+
+    def _before_request(self, now: datetime) -> None:
+        if self.circuit == CIRCUIT_CLOSED:
+            return
+        if self.circuit == CIRCUIT_OPEN and now >= self.retry_at:
+            self.circuit = CIRCUIT_HALF_OPEN
+            return
+        # Open, or half-open with the probe still in flight
+        raise CircuitOpenError(
+            f"Ühendus peatatud kuni {dt_util.as_local(self.retry_at):%H:%M:%S} ({self.failures} järjestikust viga)"
+        )
+
+    def _record_success(self) -> None:
+        self.circuit = CIRCUIT_CLOSED
+        self.failures = 0
+        self.retry_at = None
+
+    def _record_failure(self, now: datetime, retry_after: timedelta | None = None) -> None:
+        self.failures += 1
+        if self.failures < CIRCUIT_FAILURE_THRESHOLD and retry_after is None and self.circuit == CIRCUIT_CLOSED:
+            return
+        # Equal jitter: half of the back-off is fixed, the other half random, so entries do not retry in lockstep
+        backoff = min(BACKOFF_BASE * 2 ** max(self.failures - CIRCUIT_FAILURE_THRESHOLD, 0), BACKOFF_MAX)
+        backoff = backoff / 2 + backoff / 2 * random.random()
+        self.circuit = CIRCUIT_OPEN
+        self.retry_at = now + max(backoff, retry_after or timedelta())
+
+    async def async_fetch(self, session: ClientSession, conditional: bool = True) -> bytes | None:
+        """Return the response body, or None when the server answered 304 Not Modified.
+
+        Raises CircuitOpenError without a request while the circuit breaker is open.
+        """
+        now = dt_util.utcnow()
+        self._before_request(now)
+        try:
+            async with asyncio.timeout(FETCH_TIMEOUT):
+                body = await self._async_request(session, conditional)
+        except ClientResponseError as err:
+            retry_after = _retry_after(err.headers.get("Retry-After"), now) if err.headers else None
+            self._record_failure(now, retry_after if err.status in (429, 503) else None)
+            raise
+        except Exception:
+            # Any other error counts as a failed request too, so a probe cannot leave the breaker half-open
+            self._record_failure(now)
+            raise
+        except asyncio.CancelledError:
+            # A cancelled probe must not leave the breaker half-open forever
+            if self.circuit == CIRCUIT_HALF_OPEN:
+                self.circuit = CIRCUIT_OPEN
+            raise
+        self._record_success()
+        return body
+
+    async def _async_request(self, session: ClientSession, conditional: bool) -> bytes | None:
+        headers = {**HEADERS, "Accept-Encoding": ACCEPT_ENCODING}
+        if conditional:
+            if self.etag: headers["If-None-Match"] = self.etag
+            if self.last_modified: headers["If-Modified-Since"] = self.last_modified
+
+        async with session.get(self.url, headers=headers) as res:
+            self.requests += 1
+            if res.status == 304:
+                self.not_modified += 1
+                self.last_response_bytes = 0
+                self.bytes_saved += self._last_wire_size
+                return None
+            res.raise_for_status()
+            body = await res.read()
+            # content_length is the encoded size on the wire when the server sends it
+            wire_size = res.content_length or len(body)
+            self.bytes_received += wire_size
+            self.bytes_saved += max(len(body) - wire_size, 0)
+            self._last_wire_size = wire_size
+            self.last_response_bytes = wire_size
+            self.etag = res.headers.get("ETag")
+            self.last_modified = res.headers.get("Last-Modified")
+            return body
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of requests answered with 304 Not Modified."""
+        return round(self.not_modified / self.requests, 3) if self.requests else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "hit_ratio": self.hit_ratio,
+            "bytes_received": self.bytes_received,
+            "bytes_saved": self.bytes_saved,
+        }
+
+    def circuit_as_dict(self) -> dict:
+        return {
+            "state": self.circuit,
+            "failures": self.failures,
+            "retry_at": self.retry_at.isoformat() if self.retry_at else None,
+        }
+
+
+class SharedFetch:
+    """One running fetch that every caller asking while it runs waits for."""
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def async_run(self, start):
+        """Return the result of the running fetch, starting start() first when there is none."""
+        if self._task is None:
+            self._task = self.hass.async_create_task(start())
+            self._task.add_done_callback(self._clear)
+        # Shield so that one cancelled caller does not abort the fetch for the others
+        return await asyncio.shield(self._task)
+
+    def _clear(self, task) -> None:
+        if self._task is task:
+            self._task = None
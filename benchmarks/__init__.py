@@ -0,0 +1,27 @@
+# In /custom_components/ilmaprognoos/benchmarks/__init__.py
+"""Offline benchmarks of the update and forecast hot paths.
+
+Run from the repository root with `python -m benchmarks`. Home Assistant
+must be installed. Only `--record`, which downloads live payloads to run
+with `--fixtures`, uses the network.
+"""
+
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+INTEGRATION_ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "ilmaprognoos"
+
+
+def load_integration(module: str):
+    """Import a module of the integration, whatever the checkout directory is called."""
+    if PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE, INTEGRATION_ROOT / "__init__.py", submodule_search_locations=[str(INTEGRATION_ROOT)]
+        )
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE] = package
+        spec.loader.exec_module(package)
+    return importlib.import_module(f"{PACKAGE}.{module}")
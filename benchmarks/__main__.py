@@ -0,0 +1,67 @@
+# In /custom_components/ilmaprognoos/benchmarks/__main__.py
+
+import argparse
+import json
+import platform
+import sys
+from pathlib import Path
+
+from .fixtures import CAPTURED, SAMPLE, SIZES, load_fixtures, record_fixtures
+from .suite import LATITUDE, LONGITUDE, TIME_TOLERANCE, build_stages, calibrate, compare, run_stages
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the update and forecast hot paths offline.")
+    parser.add_argument("--size", action="append", choices=[*sorted(SIZES), SAMPLE], help="fixture size to run, repeatable (default: all)")
+    parser.add_argument("--stage", action="append", help="stage to run, repeatable (default: all)")
+    parser.add_argument("--fixtures", type=Path, help="directory with captured observations.xml and meteogram.json, run as size 'captured'")
+    parser.add_argument("--record", type=Path, metavar="DIR", help="download and trim the live payloads into DIR (uses the network), then exit")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="allowed slowdown as a fraction (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.record, f"{LATITUDE};{LONGITUDE}")
+        print(f"Recorded; run them with --fixtures {args.record}")
+        return 0
+
+    runs = {CAPTURED: args.fixtures} if args.fixtures else {size: None for size in (args.size or [*SIZES, SAMPLE])}
+    calibration = calibrate()
+    results = {}
+    for size, directory in runs.items():
+        observations, meteogram = load_fixtures(size, directory)
+        results[size] = run_stages(build_stages(observations, meteogram), set(args.stage or ()))
+        print(f"\n{size}: observations {len(observations) / 1024:.0f} KiB, meteogram {len(meteogram) / 1024:.0f} KiB")
+        print(f"  {'stage':<20}{'time µs':>12}{'peak KiB':>12}")
+        for name, result in results[size].items():
+            print(f"  {name:<20}{result.us:>12.1f}{result.peak_kib:>12.1f}")
+
+    if args.save_baseline:
+        baseline = {
+            "python": platform.python_version(),
+            "calibration_us": round(calibration, 2),
+            "results": {size: {name: result._asdict() for name, result in stages.items()} for size, stages in results.items()},
+        }
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline first")
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("python") != platform.python_version():
+        print(f"\nBaseline was recorded on Python {baseline.get('python')}, allocations may differ")
+    regressions = compare(results, baseline, calibration, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print("\nNo regressions against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
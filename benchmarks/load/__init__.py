@@ -0,0 +1,5 @@
+# In /custom_components/ilmaprognoos/benchmarks/load/__init__.py
+"""Load test of many config entries against a local stand-in for ilmateenistus.ee.
+
+Run from the repository root with `python -m benchmarks.load --help`.
+"""
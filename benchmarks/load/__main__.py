@@ -0,0 +1,334 @@
+# In /custom_components/ilmaprognoos/benchmarks/load/__main__.py
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import NamedTuple
+
+from .. import load_integration
+from ..fixtures import SIZES, station_names
+from .server import METEOGRAM_PATH, OBSERVATIONS_PATH, StandInUpstream
+
+# Home Assistant's own default executor size
+DEFAULT_WORKERS = 64
+# Loop lag is the overshoot of a sleep of this length
+MONITOR_INTERVAL = 0.01
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Default executor that counts the jobs submitted and not yet finished."""
+
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix="SyncWorker")
+        self.workers = max_workers
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        def run():
+            try: return fn(*args, **kwargs)
+            finally:
+                with self._lock: self.pending -= 1
+        with self._lock: self.pending += 1
+        return super().submit(run)
+
+
+class LoopMonitor:
+    """Samples event loop lag and executor load while a phase runs."""
+
+    def __init__(self, executor: CountingExecutor):
+        self.executor = executor
+        self.lags = []
+        self.peak_pending = 0
+        self._task = None
+
+    def reset(self) -> None:
+        self.lags = []
+        self.peak_pending = 0
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(MONITOR_INTERVAL)
+            self.lags.append((loop.time() - start - MONITOR_INTERVAL) * 1000)
+            self.peak_pending = max(self.peak_pending, self.executor.pending)
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try: await self._task
+        except asyncio.CancelledError: pass
+
+
+class PhaseResult(NamedTuple):
+    name: str
+    wall_s: float
+    updates: list
+    failures: int
+    lags: list
+    blocking: list
+    peak_pending: int
+    requests: dict
+    # Meteogram bytes the coordinators reported and the stand-in actually served
+    forecast_bytes: tuple
+
+    def as_dict(self, workers: int) -> dict:
+        return {
+            "wall_s": round(self.wall_s, 2),
+            "updates": len(self.updates),
+            "failures": self.failures,
+            "update_ms": _summary(self.updates),
+            "loop_lag_ms": _summary(self.lags),
+            "update_loop_blocking_ms": _summary(self.blocking),
+            "executor_peak_jobs": self.peak_pending,
+            "executor_peak_queued": max(self.peak_pending - workers, 0),
+            "requests": self.requests,
+            "forecast_bytes": {"reported": self.forecast_bytes[0], "served": self.forecast_bytes[1]},
+        }
+
+
+def _summary(values: list) -> dict:
+    if not values: return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(values)
+    pick = lambda pct: round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 2)
+    return {"p50": pick(50), "p95": pick(95), "max": round(ordered[-1], 2)}
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _failed(coordinator) -> bool:
+    """Whether the coordinator's last refresh failed; one that kept the previous data still reports success to Home Assistant."""
+    return not coordinator.last_update_success or coordinator.api_fetch_error
+
+
+async def _timed(call) -> float:
+    start = perf_counter()
+    await call()
+    return (perf_counter() - start) * 1000
+
+
+class LoadTest:
+    """Many coordinators on one Home Assistant core, driven through startup, timer cycles and refresh storms."""
+
+    def __init__(self, args, base_url: str, upstream: StandInUpstream):
+        self.args = args
+        self.base_url = base_url
+        self.upstream = upstream
+        self.hass = None
+        self.coordinators = []
+        self.fleet = None
+        self.results = []
+        self.memory = {}
+
+    def _patch_urls(self) -> None:
+        load_integration("observations").XML_OBSERVATIONS_URL = self.base_url + OBSERVATIONS_PATH
+        load_integration("forecast_cache").FORECAST_URL_FORMAT = self.base_url + METEOGRAM_PATH + "?coordinates={coords}"
+
+    def _create_coordinators(self) -> None:
+        from homeassistant.config_entries import ConfigEntry, current_entry
+        coordinator_module = load_integration("coordinator")
+        const = load_integration("const")
+        rng = random.Random(self.args.seed)
+        names = station_names(SIZES[self.args.size])
+        points = [(57.6 + rng.random() * 2, 22 + rng.random() * 6) for _ in range(self.args.locations or self.args.entries)]
+        locations = []
+        for i in range(self.args.entries):
+            lat, lon = points[i % len(points)]
+            forecast_only = rng.random() < self.args.forecast_only
+            primary, secondary = rng.sample(names, 2)
+            data = {
+                "location_name": f"Koormus {i}", "slug": f"koormus_{i}", "coords": f"{lat:.4f};{lon:.4f}",
+                "primary_station": const.FORECAST_ONLY_ID if forecast_only else primary,
+                "secondary_station": const.NO_SECONDARY_ID if forecast_only else secondary,
+            }
+            if self.args.fleet:
+                locations.append(data)
+                continue
+            entry = ConfigEntry(version=1, minor_version=1, domain=const.DOMAIN, title=data["location_name"], data=data, source="user", options={})
+            # The coordinator base class reads its config entry from this context
+            token = current_entry.set(entry)
+            try: self.coordinators.append(coordinator_module.IlmaprognoosDataUpdateCoordinator(self.hass, entry))
+            finally: current_entry.reset(token)
+
+        if self.args.fleet:
+            data = {const.CONF_FLEET: True, "location_name": "Koormus", "slug": "koormus"}
+            entry = ConfigEntry(version=1, minor_version=1, domain=const.DOMAIN, title="Koormus", data=data, source="user", options={const.CONF_LOCATIONS: locations})
+            token = current_entry.set(entry)
+            try: self.fleet = load_integration("fleet").IlmaprognoosFleet(self.hass, entry)
+            finally: current_entry.reset(token)
+            self.coordinators = list(self.fleet.coordinators.values())
+
+    async def _phase(self, name: str, monitor: LoopMonitor, calls: list) -> None:
+        before = Counter(self.upstream.requests)
+        served_before = self.upstream.bytes_served["meteogram"]
+        # Each phase reports only its own transfers; a refresh adds at most one sample
+        bytes_stage = load_integration("metrics").STAGE_FORECAST_BYTES
+        for coordinator in self.coordinators:
+            if (stat := coordinator.metrics.get(bytes_stage)) is not None: stat.samples.clear()
+        monitor.reset()
+        start = perf_counter()
+        updates = await asyncio.gather(*(_timed(call) for call in calls))
+        wall = perf_counter() - start
+        failures = sum(_failed(coordinator) for coordinator in self.coordinators)
+        requests = dict(sorted((Counter(self.upstream.requests) - before).items()))
+        # How long each update itself held the loop, as the coordinator measured it
+        stage = load_integration("metrics").STAGE_LOOP_BLOCKING
+        blocking = [
+            stat.last for coordinator in self.coordinators
+            if not _failed(coordinator) and (stat := coordinator.metrics.get(stage)) is not None
+        ]
+        reported = sum(
+            sum(stat.samples) for coordinator in self.coordinators
+            if (stat := coordinator.metrics.get(bytes_stage)) is not None
+        )
+        served = self.upstream.bytes_served["meteogram"] - served_before
+        self.results.append(PhaseResult(name, wall, list(updates), failures, list(monitor.lags), blocking, monitor.peak_pending, requests, (int(reported), served)))
+
+    async def _fleet_round(self) -> None:
+        for coordinator in self.coordinators:
+            for schedule in coordinator.schedules.values(): schedule.reset()
+            coordinator.next_refresh = None
+        await self.fleet.async_refresh()
+
+    async def _staggered_refresh(self, coordinator, delay: float) -> None:
+        await asyncio.sleep(delay)
+        for schedule in coordinator.schedules.values(): schedule.reset()
+        await coordinator.async_refresh()
+
+    async def run(self, executor: CountingExecutor) -> None:
+        from homeassistant.core import HomeAssistant
+        asyncio.get_running_loop().set_default_executor(executor)
+        self._patch_urls()
+        with tempfile.TemporaryDirectory() as config_dir:
+            self.hass = HomeAssistant(config_dir)
+            self.hass.config.latitude, self.hass.config.longitude = 59.437, 24.7536
+            self.hass.config.set_time_zone("Europe/Tallinn")
+            monitor = LoopMonitor(executor)
+            monitor.start()
+
+            gc.collect()
+            rss_before = _rss_bytes()
+            if self.args.tracemalloc: tracemalloc.start()
+            self._create_coordinators()
+            if self.fleet is not None:
+                await self._phase("startup", monitor, [lambda: self.fleet.async_refresh(self.coordinators)])
+            else:
+                await self._phase("startup", monitor, [coordinator.async_refresh for coordinator in self.coordinators])
+            gc.collect()
+            self.memory["rss_per_entry_kib"] = round((_rss_bytes() - rss_before) / 1024 / len(self.coordinators), 1)
+            if self.args.tracemalloc:
+                self.memory["python_heap_per_entry_kib"] = round(tracemalloc.get_traced_memory()[0] / 1024 / len(self.coordinators), 1)
+                tracemalloc.stop()
+
+            rng = random.Random(self.args.seed)
+            for cycle in range(self.args.cycles if self.fleet is None else 0):
+                # Independent timers: every entry refreshes once at a random moment of the spread
+                calls = [
+                    lambda c=coordinator, d=rng.random() * self.args.spread: self._staggered_refresh(c, d)
+                    for coordinator in self.coordinators
+                ]
+                await self._phase(f"cycle {cycle + 1}", monitor, calls)
+
+            # A fleet's scheduler refreshes every location in one round, with bounded concurrency
+            for cycle in range(self.args.cycles if self.fleet is not None else 0):
+                await self._phase(f"cycle {cycle + 1}", monitor, [self._fleet_round])
+
+            # Storms: every entry at the same moment
+            if self.fleet is not None:
+                await self._phase("options storm", monitor, [self.fleet.async_update_options])
+                await self._phase("manual storm", monitor, [lambda: self.fleet.async_refresh(self.coordinators)])
+            else:
+                await self._phase("options storm", monitor, [coordinator.async_update_intervals for coordinator in self.coordinators])
+                await self._phase("manual storm", monitor, [coordinator.async_refresh for coordinator in self.coordinators])
+
+            await monitor.stop()
+            if self.fleet is not None:
+                self.fleet.async_shutdown()
+            for coordinator in self.coordinators:
+                await coordinator.async_shutdown()
+            await self.hass.async_stop(force=True)
+
+
+def _print_report(results: list, memory: dict, workers: int, check_transfer: bool) -> None:
+    print(f"\n{'phase':<15}{'wall s':>8}{'updates':>9}{'failed':>8}{'update ms p50/p95/max':>26}{'lag ms p50/p95/max':>24}{'blocking ms p50/p95/max':>26}{'exec peak':>11}  requests")
+    for result in results:
+        row = result.as_dict(workers)
+        update = "/".join(f"{row['update_ms'][k]}" for k in ("p50", "p95", "max"))
+        lag = "/".join(f"{row['loop_lag_ms'][k]}" for k in ("p50", "p95", "max"))
+        blocking = "/".join(f"{row['update_loop_blocking_ms'][k]}" for k in ("p50", "p95", "max"))
+        requests = ", ".join(f"{key} {count}" for key, count in row["requests"].items())
+        print(f"{result.name:<15}{row['wall_s']:>8}{row['updates']:>9}{row['failures']:>8}{update:>26}{lag:>24}{blocking:>26}{row['executor_peak_jobs']:>7}/{workers:<3}  {requests}")
+    print("\nmemory: " + ", ".join(f"{key} {value}" for key, value in memory.items()))
+    for result in results if check_transfer else ():
+        reported, served = result.forecast_bytes
+        if reported != served:
+            print(f"{result.name}: coordinators reported {reported} forecast bytes but the stand-in served {served}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description="Load test many config entries against a local stand-in upstream.")
+    parser.add_argument("--entries", type=int, default=50)
+    parser.add_argument("--locations", type=int, help="distinct forecast points shared by the entries (default: one per entry)")
+    parser.add_argument("--fleet", action="store_true", help="run the entries as the locations of one fleet entry")
+    parser.add_argument("--forecast-only", type=float, default=0.0, help="share of forecast-only entries")
+    parser.add_argument("--size", choices=sorted(SIZES), default="typical", help="payload size served")
+    parser.add_argument("--latency", type=float, default=0.1, help="mean upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="standard deviation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--publish", type=float, default=30.0, help="seconds between new upstream publications")
+    parser.add_argument("--cycles", type=int, default=3, help="timer cycles after startup")
+    parser.add_argument("--spread", type=float, default=10.0, help="seconds over which a cycle's refreshes are spread")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="executor threads")
+    parser.add_argument("--tracemalloc", action="store_true", help="also measure Python heap per entry (slows startup)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    args = parser.parse_args()
+
+    upstream = StandInUpstream(args.size, args.latency, args.jitter, args.error_rate, args.publish, args.seed)
+    base_url = upstream.start_in_thread()
+    executor = CountingExecutor(args.workers)
+    test = LoadTest(args, base_url, upstream)
+    try:
+        asyncio.run(test.run(executor))
+    finally:
+        upstream.stop_thread()
+        executor.shutdown(wait=False)
+
+    # Transfer reported twice, e.g. by every caller of a shared forecast, fails the run. With injected
+    # errors a failed refresh returns before its forecast fetch does, so those bytes land in a later phase.
+    check_transfer = not args.error_rate
+    _print_report(test.results, test.memory, args.workers, check_transfer)
+    consistent = not check_transfer or all(result.forecast_bytes[0] == result.forecast_bytes[1] for result in test.results)
+    if args.json:
+        report = {
+            "arguments": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+            "phases": {result.name: result.as_dict(args.workers) for result in test.results},
+            "memory": test.memory,
+        }
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    return 0 if consistent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
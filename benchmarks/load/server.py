@@ -0,0 +1,105 @@
+# In /custom_components/ilmaprognoos/benchmarks/load/server.py
+
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+
+from aiohttp import web
+
+from ..fixtures import SIZES, meteogram_document, observations_document
+
+OBSERVATIONS_PATH = "/observations.php"
+# Same shape as the real meteogram URL, including the slash before the query
+METEOGRAM_PATH = "/meteogram.php/"
+
+
+class StandInUpstream:
+    """Local stand-in for ilmateenistus.ee serving generated observations and meteograms.
+
+    Every publish_interval seconds a new publication replaces the documents.
+    Responses carry an ETag per publication and a matching If-None-Match is
+    answered with 304, like upstream does. Each request waits latency seconds
+    (gaussian with the given jitter) and fails with a 500 with probability
+    error_rate. Both documents are generated once per publication and every
+    coordinate gets the same meteogram, so the stand-in itself stays cheap
+    and small next to the measured core.
+    """
+
+    def __init__(self, size: str = "typical", latency: float = 0.1, jitter: float = 0.05,
+                 error_rate: float = 0.0, publish_interval: float = 60.0, seed: int = 1):
+        self.size = SIZES[size]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.publish_interval = publish_interval
+        self.requests = Counter()
+        # Body bytes of the 200 responses per kind
+        self.bytes_served = Counter()
+        # Meteogram requests per coordinates query
+        self.coordinates = Counter()
+        self._random = random.Random(seed)
+        self._started = time.monotonic()
+        self._publication = None
+        self._observations = None
+        self._meteogram = None
+        self._runner = None
+        self._loop = None
+
+    def _current_publication(self) -> int:
+        publication = int((time.monotonic() - self._started) / self.publish_interval)
+        if publication != self._publication:
+            self._publication = publication
+            self._observations = observations_document(self.size, seed=publication)
+            self._meteogram = meteogram_document(self.size, seed=publication)
+        return publication
+
+    async def _respond(self, request: web.Request, kind: str) -> web.Response:
+        delay = self._random.gauss(self.latency, self.jitter)
+        if delay > 0: await asyncio.sleep(delay)
+        if self._random.random() < self.error_rate:
+            self.requests[f"{kind}_500"] += 1
+            return web.Response(status=500)
+        publication = self._current_publication()
+        etag = f'"{kind}-{publication}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.requests[f"{kind}_304"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        self.requests[f"{kind}_200"] += 1
+        body = self._observations if kind == "observations" else self._meteogram
+        self.bytes_served[kind] += len(body)
+        return web.Response(body=body, headers={"ETag": etag})
+
+    async def _observations_handler(self, request: web.Request) -> web.Response:
+        return await self._respond(request, "observations")
+
+    async def _meteogram_handler(self, request: web.Request) -> web.Response:
+        self.coordinates[request.query.get("coordinates", "")] += 1
+        return await self._respond(request, "meteogram")
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        app = web.Application()
+        app.router.add_get(OBSERVATIONS_PATH, self._observations_handler)
+        app.router.add_get(METEOGRAM_PATH, self._meteogram_handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def async_stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve from a thread with its own event loop, so generating payloads is not counted as lag of the measured loop."""
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="stand-in-upstream", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(self.async_start(host, port), self._loop).result()
+
+    def stop_thread(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.async_stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
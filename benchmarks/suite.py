@@ -0,0 +1,147 @@
+# In /custom_components/ilmaprognoos/benchmarks/suite.py
+
+import gc
+import json
+import timeit
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+from typing import NamedTuple
+
+from . import load_integration
+
+# Best of this many timing runs; each run lasts at least 0.2 s (timeit autorange)
+REPEAT = 5
+# A stage regresses when slower than the baseline by more than the time tolerance,
+# or when its peak allocation grows by more than MEMORY_TOLERANCE and MEMORY_SLACK_KIB
+TIME_TOLERANCE = 0.3
+MEMORY_TOLERANCE = 0.1
+MEMORY_SLACK_KIB = 4
+# Forecast point of the benchmark entry (Tallinn)
+LATITUDE, LONGITUDE = 59.437, 24.7536
+
+
+class StageResult(NamedTuple):
+    us: float
+    peak_kib: float
+
+
+def _calibration_workload():
+    data = [(i * 7919) % 1009 for i in range(2000)]
+    return sorted({str(v): v for v in data}.items())
+
+
+def calibrate() -> float:
+    """Microseconds of a fixed pure-Python workload; baseline times are scaled by it between machines."""
+    return _time(_calibration_workload)
+
+
+def _time(func) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(REPEAT, number)) / number * 1e6
+
+
+def _peak_kib(func) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def reference_condition(condition_text):
+    """The if/elif chain that conditions.CONDITION_TABLE replaced, kept so the "conditions_reference" stage shows what the table saves."""
+    if not condition_text: return "cloudy"
+    c = condition_text.lower()
+
+    if "clear spells" in c or "peamiselt pilves" in c or "selgimistega" in c: return "partlycloudy"
+    if "few clouds" in c or "vähene pilvisus" in c: return "partlycloudy"
+    if "variable clouds" in c or "poolpilves" in c or "vahelduv pilvisus" in c: return "partlycloudy"
+
+    if any(x in c for x in ["lörts", "sleet", "jäide", "glaze"]): return "snowy-rainy"
+    if any(x in c for x in ["lumi", "snow", "snowfall"]): return "snowy"
+    if any(x in c for x in ["vihm", "rain", "shower"]): return "pouring" if "heavy" in c or "tugev" in c else "rainy"
+    if any(x in c for x in ["äike", "thunder", "hail", "rahe"]): return "lightning-rainy"
+    if any(x in c for x in ["udu", "fog", "mist"]): return "fog"
+
+    if any(x in c for x in ["selge", "clear"]): return "clear"
+    if any(x in c for x in ["pilves", "cloudy", "overcast"]): return "cloudy"
+
+    return "cloudy"
+
+
+def build_stages(observations: bytes, meteogram: bytes) -> dict:
+    """Return stage name -> zero-argument callable; inputs are prepared up front so each stage is measured alone.
+
+    The coordinator and weather entity are created without Home Assistant; the
+    stages only use the attributes set here.
+    """
+    coordinator_module = load_integration("coordinator")
+    dt_util = coordinator_module.dt_util
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Tallinn"))
+    weather_module = load_integration("weather")
+    observations_module = load_integration("observations")
+    conditions = load_integration("conditions")
+    catalog_module = load_integration("catalog")
+    const = load_integration("const")
+
+    coordinator = object.__new__(coordinator_module.IlmaprognoosDataUpdateCoordinator)
+    coordinator.config_entry = SimpleNamespace(options={const.CONF_WARNING_LEVELS: ["1", "2", "3"]})
+    coordinator.ephemeris = load_integration("ephemeris").SunEphemeris(LATITUDE, LONGITUDE)
+    weather = object.__new__(weather_module.IlmaprognoosWeather)
+    weather.coordinator = coordinator
+
+    # An entry reads the last stations of the document, the worst case for the streaming parser
+    names = catalog_module.StationCatalog.from_document(observations).names[-2:]
+    decoded = json.loads(meteogram)
+    hourly = coordinator._process_hourly_forecast(decoded)
+    daily = coordinator._process_daily_forecast(hourly)
+    warnings = coordinator._process_warnings(coordinator._decode_warnings(decoded))
+    texts = hourly.condition_texts_et
+    current_hour = hourly.times[0] if len(hourly) else datetime.now()
+
+    return {
+        "observations_parse": lambda: observations_module.parse_stations(observations, names),
+        "catalog_build": lambda: catalog_module.StationCatalog.from_document(observations),
+        "forecast_decode": lambda: json.loads(meteogram),
+        "forecast_hourly": lambda: coordinator._process_hourly_forecast(decoded),
+        "forecast_daily": lambda: coordinator._process_daily_forecast(hourly),
+        "warnings": lambda: coordinator._process_warnings(coordinator._decode_warnings(decoded)),
+        "sunshine": lambda: coordinator._process_sunshine_forecast(hourly),
+        "precipitation": lambda: coordinator._process_precipitation_forecast(hourly),
+        "conditions": lambda: ([conditions.classify_condition(text) for text in texts], conditions.classify_warnings(warnings)),
+        "conditions_reference": lambda: ([reference_condition(text) for text in texts], conditions.classify_warnings(warnings)),
+        "weather_hourly": lambda: weather._build_forecast_hourly(hourly, current_hour),
+        "weather_daily": lambda: weather._build_forecast_daily(daily),
+    }
+
+
+def run_stages(stages: dict, only: set | None = None) -> dict:
+    results = {}
+    for name, func in stages.items():
+        if only and name not in only: continue
+        # Memory first, so tracemalloc does not inflate the timings
+        peak = _peak_kib(func)
+        results[name] = StageResult(round(_time(func), 2), round(peak, 1))
+    return results
+
+
+def compare(results: dict, baseline: dict, calibration: float, time_tolerance: float = TIME_TOLERANCE) -> list:
+    """Return a description of every stage that regressed against the baseline."""
+    scale = calibration / baseline["calibration_us"]
+    regressions = []
+    for size, stages in results.items():
+        for name, result in stages.items():
+            expected = baseline["results"].get(size, {}).get(name)
+            if expected is None: continue
+            allowed_us = expected["us"] * scale * (1 + time_tolerance)
+            if result.us > allowed_us:
+                regressions.append(f"{size}/{name}: {result.us:.1f} µs > {allowed_us:.1f} µs allowed")
+            allowed_kib = expected["peak_kib"] * (1 + MEMORY_TOLERANCE) + MEMORY_SLACK_KIB
+            if result.peak_kib > allowed_kib:
+                regressions.append(f"{size}/{name}: peak {result.peak_kib:.1f} KiB > {allowed_kib:.1f} KiB allowed")
+    return regressions
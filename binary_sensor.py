@@ -7,10 +7,13 @@ from homeassistant.components.binary_sensor import (
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.const import EntityCategory
 
-from .const import DOMAIN
+from .const import DOMAIN, CONF_FLEET
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the binary sensor platform."""
+    if entry.data.get(CONF_FLEET):
+        async_add_entities([IlmaprognoosFleetStatusSensor(hass.data[DOMAIN][entry.entry_id])])
+        return
     coordinator = hass.data[DOMAIN][entry.entry_id]
     async_add_entities([IlmaprognoosStatusSensor(coordinator)])
 
@@ -21,6 +24,11 @@ class IlmaprognoosStatusSensor(CoordinatorEntity, BinarySensorEntity):
     _attr_has_entity_name = True
     _attr_device_class = BinarySensorDeviceClass.PROBLEM
     _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # Diagnostics that change with every refresh would add an attribute row to the recorder each time
+    _unrecorded_attributes = frozenset({
+        "last_successful_update", "forecast_transfer", "observations_transfer", "forecast_cell",
+        "forecast_circuit", "observations_circuit", "skipped_writes", "schedule", "metrics",
+    })
 
     def __init__(self, coordinator):
         """Initialize the sensor."""
@@ -59,8 +67,98 @@ class IlmaprognoosStatusSensor(CoordinatorEntity, BinarySensorEntity):
             "last_successful_update": getattr(self.coordinator, "last_update_success_timestamp", None)
         }
         
+        # Data restored from disk at startup until the first successful refresh
+        if self.coordinator.is_stale:
+            attrs["stale"] = True
+            attrs["stored_at"] = self.coordinator.stored_at
+
         # --- NEW: Show exact error message if an error occurred ---
         if error_reason := getattr(self.coordinator, "last_error_reason", None):
             attrs["veateade"] = error_reason
+
+        # Conditional GET and compression savings per upstream endpoint
+        attrs["forecast_transfer"] = self.coordinator.forecast_endpoint.as_dict()
+        # Grid cell whose forecast download is shared with the entries in it
+        attrs["forecast_cell"] = self.coordinator.forecast_cell
+        if not self.coordinator.is_forecast_only:
+            attrs["observations_transfer"] = self.coordinator.observations.endpoint.as_dict()
+
+        # Circuit breaker per endpoint: closed, open (failing fast until retry_at) or half_open (probing)
+        attrs["forecast_circuit"] = self.coordinator.forecast_endpoint.circuit_as_dict()
+        if not self.coordinator.is_forecast_only:
+            attrs["observations_circuit"] = self.coordinator.observations.endpoint.circuit_as_dict()
+
+        # Entity state writes skipped because nothing an entity shows had changed
+        attrs["skipped_writes"] = self.coordinator.skipped_writes
+
+        # Learned publication cadence and next planned fetch per source
+        attrs["schedule"] = {source: schedule.as_dict() for source, schedule in self.coordinator.schedules.items()}
+
+        # Rolling last/p50/p95 per update stage; times in ms, sizes in bytes
+        metrics = self.coordinator.metrics.as_dict()
+        if not self.coordinator.is_forecast_only:
+            metrics.update(self.coordinator.observations.metrics.as_dict())
+        attrs["metrics"] = metrics
             
         return attrs
+
+
+class IlmaprognoosFleetStatusSensor(BinarySensorEntity):
+    """Update status of a fleet entry; on when any of its locations failed its last update."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Uuendamise staatus"
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = False
+    # Round times and metrics change with every round; see IlmaprognoosStatusSensor
+    _unrecorded_attributes = frozenset({"last_round", "next_round", "metrics"})
+
+    def __init__(self, fleet):
+        """Initialize the sensor."""
+        self.fleet = fleet
+        self._attr_unique_id = f"{fleet.entry.entry_id}_status"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, fleet.entry.entry_id)},
+            "name": fleet.name,
+            "manufacturer": "Ilmaprognoos",
+            "entry_type": "service",
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Write the state after every round of the fleet's scheduler."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.fleet.async_add_listener(self.async_write_ha_state))
+
+    def _failed(self) -> dict:
+        return {
+            coordinator.location_name: coordinator.last_error_reason or "Uuendamine ebaõnnestus"
+            for coordinator in self.fleet.coordinators.values()
+            if not coordinator.last_update_success or coordinator.api_fetch_error
+        }
+
+    @property
+    def is_on(self):
+        """Return true if any location has an error."""
+        return bool(self._failed())
+
+    @property
+    def extra_state_attributes(self):
+        """Return the round times and the error message per failed location."""
+        coordinators = self.fleet.coordinators.values()
+        attrs = {
+            "locations": len(coordinators),
+            "last_round": self.fleet.last_round,
+            "next_round": self.fleet.next_round,
+        }
+        if failed := self._failed():
+            attrs["veateade"] = failed
+        if stale := [coordinator.location_name for coordinator in coordinators if coordinator.is_stale]:
+            attrs["stale"] = stale
+
+        # Round duration and size, plus the observations hub all locations share
+        metrics = self.fleet.metrics.as_dict()
+        if any(not coordinator.is_forecast_only for coordinator in coordinators):
+            metrics.update(next(iter(coordinators)).observations.metrics.as_dict())
+        attrs["metrics"] = metrics
+        return attrs
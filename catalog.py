@@ -0,0 +1,137 @@
+# In /custom_components/ilmaprognoos/catalog.py
+
+import heapq
+import io
+import math
+import xml.etree.ElementTree as ET
+from array import array
+from typing import NamedTuple
+
+from .const import STATION_FIELD_MAPPING
+
+EARTH_RADIUS_KM = 6371
+
+# One bit per reported field, in a fixed order so bitmaps stay comparable between catalogs
+CAPABILITY_FIELDS = (*STATION_FIELD_MAPPING.values(), "phenomenon")
+CAPABILITY_BITS = {tag: 1 << bit for bit, tag in enumerate(CAPABILITY_FIELDS)}
+
+
+class CatalogStation(NamedTuple):
+    name: str
+    wmocode: str | None
+    latitude: float
+    longitude: float
+    capabilities: int
+    distance: float | None = None
+
+    @property
+    def field_count(self) -> int:
+        """Number of fields the station reported when the catalog was built."""
+        return self.capabilities.bit_count()
+
+    def reports(self, field: str) -> bool:
+        return bool(self.capabilities & CAPABILITY_BITS[field])
+
+
+def _unit_vector(latitude: float, longitude: float) -> tuple:
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+
+
+class StationCatalog:
+    """Position, stable id and reported fields of every observation station.
+
+    Each station's position is kept as a unit vector, so ranking stations by
+    great-circle distance needs only a dot product per station. The larger
+    the dot product, the closer the station. The trigonometry is done only
+    for the k stations that are returned.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.wmocodes = []
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.capabilities = []
+        self._x = array("d")
+        self._y = array("d")
+        self._z = array("d")
+        self._index = {}
+
+    @classmethod
+    def from_document(cls, xml_data: bytes) -> "StationCatalog":
+        """Build the catalog from an observations document in a single streaming pass."""
+        catalog = cls()
+        context = ET.iterparse(io.BytesIO(xml_data), events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end" or elem.tag != "station":
+                continue
+            name = latitude = longitude = wmocode = None
+            capabilities = 0
+            for child in elem:
+                text = child.text.strip() if child.text else ""
+                if not text: continue
+                if child.tag == "name": name = text
+                elif child.tag == "latitude": latitude = text
+                elif child.tag == "longitude": longitude = text
+                elif child.tag == "wmocode": wmocode = text
+                else: capabilities |= CAPABILITY_BITS.get(child.tag, 0)
+            root.clear()
+            try:
+                if name: catalog._add(name, wmocode, float(latitude), float(longitude), capabilities)
+            except (TypeError, ValueError):
+                continue
+        return catalog
+
+    def _add(self, name, wmocode, latitude, longitude, capabilities) -> None:
+        self._index[name] = len(self.names)
+        self.names.append(name)
+        self.wmocodes.append(wmocode)
+        self.latitudes.append(latitude)
+        self.longitudes.append(longitude)
+        self.capabilities.append(capabilities)
+        x, y, z = _unit_vector(latitude, longitude)
+        self._x.append(x)
+        self._y.append(y)
+        self._z.append(z)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def _station(self, index: int, distance: float | None = None) -> CatalogStation:
+        return CatalogStation(
+            self.names[index], self.wmocodes[index], self.latitudes[index],
+            self.longitudes[index], self.capabilities[index], distance,
+        )
+
+    def get(self, name: str) -> CatalogStation | None:
+        index = self._index.get(name)
+        return None if index is None else self._station(index)
+
+    def by_wmocode(self, wmocode: str) -> CatalogStation | None:
+        """Look a station up by its WMO code, which survives renames."""
+        if not wmocode: return None
+        for index, code in enumerate(self.wmocodes):
+            if code == wmocode: return self._station(index)
+        return None
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5, reporting_only: bool = True) -> list:
+        """Return the k stations closest to a point, nearest first, with distance in km.
+
+        Stations that reported no fields are skipped unless reporting_only is False.
+        """
+        px, py, pz = _unit_vector(latitude, longitude)
+        dots = map(lambda x, y, z: x * px + y * py + z * pz, self._x, self._y, self._z)
+        candidates = enumerate(dots)
+        if reporting_only:
+            capabilities = self.capabilities
+            candidates = ((index, dot) for index, dot in candidates if capabilities[index])
+        closest = heapq.nlargest(k, candidates, key=lambda item: item[1])
+        return [
+            self._station(index, EARTH_RADIUS_KM * math.acos(max(-1.0, min(1.0, dot))))
+            for index, dot in closest
+        ]
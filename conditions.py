@@ -0,0 +1,111 @@
+# In /custom_components/ilmaprognoos/conditions.py
+
+from functools import lru_cache
+
+# Observation phenomena (English) and their Estonian display names
+PHENOMENON_TRANSLATIONS = {
+    "clear": "Selge",
+    "few clouds": "Vähene pilvisus",
+    "variable clouds": "Poolpilves",
+    "cloudy with clear spells": "Peamiselt pilves",
+    "overcast": "Pilves",
+    "light snow shower": "Nõrk hooglumi",
+    "moderate snow shower": "Mõõdukas hooglumi",
+    "heavy snow shower": "Tugev hooglumi",
+    "light shower": "Nõrk hoovihm",
+    "moderate shower": "Mõõdukas hoovihm",
+    "heavy shower": "Tugev hoovihm",
+    "light rain": "Nõrk vihm",
+    "moderate rain": "Mõõdukas vihm",
+    "heavy rain": "Tugev vihm",
+    "glaze": "Jäide",
+    "light sleet": "Nõrk lörtsisadu",
+    "moderate sleet": "Mõõdukas lörtsisadu",
+    "light snowfall": "Nõrk lumesadu",
+    "moderate snowfall": "Mõõdukas lumesadu",
+    "heavy snowfall": "Tugev lumesadu",
+    "hail": "Rahe",
+    "mist": "Uduvine",
+    "fog": "Udu"
+}
+
+# Phenomena that appear in the meteogram or in observations but have no translation above
+EXTRA_PHENOMENA = (
+    "blowing snow", "drifting snow", "thunder", "thunderstorm",
+    "vahelduv pilvisus", "pilves selgimistega", "tugev lörtsisadu",
+    "äike", "äikesevihm", "lumetuisk", "pinnatuisk",
+)
+
+# Keyword rules in priority order; the first rule with a keyword in the text wins
+_RULES = (
+    ("partlycloudy", ("clear spells", "peamiselt pilves", "selgimistega", "few clouds", "vähene pilvisus",
+                      "variable clouds", "poolpilves", "vahelduv pilvisus")),
+    ("snowy-rainy", ("lörts", "sleet", "jäide", "glaze")),
+    ("hail", ("rahe", "hail")),
+    ("lightning-rainy", ("äike", "thunder")),
+    ("snowy", ("lumi", "lume", "snow", "tuisk")),
+    ("rainy", ("vihm", "rain", "shower")),
+    ("fog", ("udu", "fog", "mist")),
+    ("clear", ("selge", "clear")),
+    ("cloudy", ("pilves", "cloudy", "overcast")),
+)
+
+
+def _classify(text: str) -> str:
+    for condition, keywords in _RULES:
+        if any(keyword in text for keyword in keywords):
+            if condition == "rainy" and ("heavy" in text or "tugev" in text):
+                return "pouring"
+            return condition
+    return "cloudy"
+
+
+# Every known phenomenon in both languages is classified once at import time
+CONDITION_TABLE = {
+    phrase: _classify(phrase)
+    for phrase in (
+        *PHENOMENON_TRANSLATIONS,
+        *(name.lower() for name in PHENOMENON_TRANSLATIONS.values()),
+        *EXTRA_PHENOMENA,
+    )
+}
+
+
+@lru_cache(maxsize=256)
+def _classify_unknown(text: str) -> str:
+    return _classify(text)
+
+
+def classify_condition(text: str | None) -> str:
+    """Map an Estonian or English phenomenon text to a Home Assistant weather condition."""
+    if not text:
+        return "cloudy"
+    key = text.lower().strip()
+    condition = CONDITION_TABLE.get(key)
+    if condition is None:
+        condition = _classify_unknown(key)
+    return condition
+
+
+def translate_phenomenon(eng_text: str) -> str:
+    return PHENOMENON_TRANSLATIONS.get(eng_text.lower().strip(), eng_text).capitalize()
+
+
+def _warning_type(warning: dict) -> str:
+    return (warning.get("warningEng") or warning.get("name") or warning.get("x-warning-id") or "").lower()
+
+
+def classify_warnings(warnings: list) -> str | None:
+    """Return the condition a list of active warnings overrides the weather with, if any."""
+    # --- FIX: Safe string parsing for warning types in English or Estonian ---
+    types = [_warning_type(w) for w in warnings]
+    for w_type in types:
+        if "thunderstorm" in w_type or "äike" in w_type: return "lightning-rainy"
+    for w_type in types:
+        if "snow" in w_type or "blizzard" in w_type or "lumi" in w_type or "tuisk" in w_type: return "snowy"
+        if "sleet" in w_type or "freezing_rain" in w_type or "lörts" in w_type or "jäide" in w_type: return "snowy-rainy"
+    for w_type in types:
+        if "rain" in w_type or "vihm" in w_type or "sadu" in w_type: return "rainy"
+        if "wind" in w_type or "tuul" in w_type: return "windy"
+        if "fog" in w_type or "udu" in w_type: return "fog"
+    return None
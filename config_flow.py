@@ -4,34 +4,25 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.helpers import selector
 import logging
-import math
-import requests
-import xml.etree.ElementTree as ET
 from homeassistant.util import slugify
 
 from .const import (
-    DOMAIN, XML_OBSERVATIONS_URL, HEADERS, FORECAST_ONLY_ID, NO_SECONDARY_ID,
+    DOMAIN, FORECAST_ONLY_ID, NO_SECONDARY_ID,
     DEFAULT_CURRENT_INTERVAL, DEFAULT_FORECAST_INTERVAL, CONF_WARNING_OVERRIDE, 
-    DEFAULT_WARNING_OVERRIDE, CONF_WARNING_LEVELS, DEFAULT_WARNING_LEVELS
+    DEFAULT_WARNING_OVERRIDE, CONF_WARNING_LEVELS, DEFAULT_WARNING_LEVELS, CONF_FLEET, CONF_LOCATIONS
 )
+from .fleet import LocationListError, format_locations, parse_locations
+from .observations import async_get_observations_hub
 
 _LOGGER = logging.getLogger(__name__)
 
-def haversine(lat1, lon1, lat2, lon2):
-    """Calculate the great circle distance between two points on the earth."""
-    R = 6371  # Radius of the earth in km
-    dLat = math.radians(lat2 - lat1)
-    dLon = math.radians(lon2 - lon1)
-    a = math.sin(dLat/2) * math.sin(dLat/2) + math.cos(math.radians(lat1)) \
-        * math.cos(math.radians(lat2)) * math.sin(dLon/2) * math.sin(dLon/2)
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-
 class IlmaprognoosConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
     
     def __init__(self):
         self.setup_data = {}
         self.top_stations = []
+        self.station_wmocodes = {}
 
     @staticmethod
     def async_get_options_flow(config_entry):
@@ -39,6 +30,8 @@ class IlmaprognoosConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_user(self, user_input=None):
         if user_input is not None:
+            if user_input.get(CONF_FLEET):
+                return await self.async_step_fleet()
             if user_input["use_home"]:
                 lat = self.hass.config.latitude
                 lon = self.hass.config.longitude
@@ -49,7 +42,40 @@ class IlmaprognoosConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return self.async_show_form(
             step_id="user", 
-            data_schema=vol.Schema({vol.Required("use_home", default=True): selector.BooleanSelector()})
+            data_schema=vol.Schema({
+                vol.Required("use_home", default=True): selector.BooleanSelector(),
+                vol.Required(CONF_FLEET, default=False): selector.BooleanSelector(),
+            })
+        )
+
+    async def async_step_fleet(self, user_input=None):
+        """Many locations under one entry, given as CSV lines."""
+        errors = {}
+        placeholders = {"line": ""}
+        if user_input is not None:
+            try:
+                catalog = await async_get_observations_hub(self.hass).async_get_catalog()
+            except Exception as e:
+                _LOGGER.error(f"Failed to fetch or parse XML stations: {e}")
+                return self.async_abort(reason="xml_fetch_failed")
+            try:
+                locations = parse_locations(user_input[CONF_LOCATIONS], catalog)
+            except LocationListError as e:
+                errors[CONF_LOCATIONS] = "invalid_locations"
+                placeholders["line"] = str(e.line)
+            else:
+                title = user_input["location_name"]
+                data = {CONF_FLEET: True, "location_name": title, "slug": slugify(title)}
+                return self.async_create_entry(title=title, data=data, options={CONF_LOCATIONS: locations})
+
+        return self.async_show_form(
+            step_id="fleet",
+            data_schema=vol.Schema({
+                vol.Required("location_name"): str,
+                vol.Required(CONF_LOCATIONS): selector.TextSelector(selector.TextSelectorConfig(multiline=True)),
+            }),
+            errors=errors,
+            description_placeholders=placeholders,
         )
 
     async def async_step_coords(self, user_input=None):
@@ -66,36 +92,17 @@ class IlmaprognoosConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 lat_str, lon_str = self.setup_data["coords"].replace(',', '.').split(';')
                 user_lat, user_lon = float(lat_str), float(lon_str)
                 
-                def fetch_xml():
-                    res = requests.get(XML_OBSERVATIONS_URL, headers=HEADERS, timeout=15)
-                    res.raise_for_status()
-                    return res.text
-                
-                xml_text = await self.hass.async_add_executor_job(fetch_xml)
-                root = ET.fromstring(xml_text)
-                
-                stations = []
-                for station in root.findall('station'):
-                    name = station.findtext('name')
-                    s_lat_text = station.findtext('latitude')
-                    s_lon_text = station.findtext('longitude')
-                    
-                    if name and s_lat_text and s_lon_text:
-                        dist = haversine(user_lat, user_lon, float(s_lat_text), float(s_lon_text))
-                        data_count = sum(1 for child in station if child.text and child.text.strip() and child.tag not in ['name', 'latitude', 'longitude', 'wmocode'])
-                        
-                        if data_count > 0:
-                            stations.append({'name': name, 'dist': dist, 'data_count': data_count})
-                
-                stations.sort(key=lambda x: x['dist'])
-                top_5 = stations[:5]
+                # The station catalog is cached by the shared observations hub, so repeated flows do not refetch it
+                catalog = await async_get_observations_hub(self.hass).async_get_catalog()
+                top_5 = catalog.nearest(user_lat, user_lon, 5)
                 
                 if top_5:
-                    richest_station = max(top_5, key=lambda x: x['data_count'])
+                    richest_station = max(top_5, key=lambda s: s.field_count)
                     top_5.remove(richest_station)
                     top_5.insert(0, richest_station)
                 
-                self.top_stations = [s['name'] for s in top_5]
+                self.top_stations = [s.name for s in top_5]
+                self.station_wmocodes = {s.name: s.wmocode for s in top_5}
                 
                 return await self.async_step_primary_station()
             except Exception as e:
@@ -107,6 +114,7 @@ class IlmaprognoosConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_primary_station(self, user_input=None):
         if user_input is not None:
             self.setup_data["primary_station"] = user_input["primary_station"]
+            self.setup_data["primary_wmocode"] = self.station_wmocodes.get(user_input["primary_station"])
             if self.setup_data["primary_station"] == FORECAST_ONLY_ID:
                 self.setup_data["secondary_station"] = NO_SECONDARY_ID
                 return self._create_final_entry()
@@ -125,6 +133,7 @@ class IlmaprognoosConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_secondary_station(self, user_input=None):
         if user_input is not None:
             self.setup_data["secondary_station"] = user_input["secondary_station"]
+            self.setup_data["secondary_wmocode"] = self.station_wmocodes.get(user_input["secondary_station"])
             return self._create_final_entry()
 
         options = [s for s in self.top_stations if s != self.setup_data["primary_station"]]
@@ -153,8 +162,23 @@ class IlmaprognoosOptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
+        is_fleet = self.config_entry.data.get(CONF_FLEET, False)
+        errors = {}
+        placeholders = {"line": ""}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            if not is_fleet:
+                return self.async_create_entry(title="", data=user_input)
+            try:
+                catalog = await async_get_observations_hub(self.hass).async_get_catalog()
+                locations = parse_locations(user_input[CONF_LOCATIONS], catalog)
+            except LocationListError as e:
+                errors[CONF_LOCATIONS] = "invalid_locations"
+                placeholders["line"] = str(e.line)
+            except Exception as e:
+                _LOGGER.error(f"Failed to fetch or parse XML stations: {e}")
+                return self.async_abort(reason="xml_fetch_failed")
+            else:
+                return self.async_create_entry(title="", data={**user_input, CONF_LOCATIONS: locations})
 
         is_forecast_only = False
         if self.config_entry.data.get("primary_station") == FORECAST_ONLY_ID:
@@ -190,4 +214,12 @@ class IlmaprognoosOptionsFlowHandler(config_entries.OptionsFlow):
             )
         )
 
-        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema_fields))
+        if is_fleet:
+            locations = user_input[CONF_LOCATIONS] if user_input is not None else format_locations(self.config_entry.options.get(CONF_LOCATIONS, []))
+            schema_fields[vol.Required(CONF_LOCATIONS, default=locations)] = selector.TextSelector(
+                selector.TextSelectorConfig(multiline=True)
+            )
+
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema(schema_fields), errors=errors, description_placeholders=placeholders
+        )
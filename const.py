@@ -9,6 +9,74 @@ LOGGER = logging.getLogger(__package__)
 DEFAULT_CURRENT_INTERVAL = timedelta(minutes=15)
 DEFAULT_FORECAST_INTERVAL = timedelta(minutes=30)
 
+# Update sources, each refreshed on its own interval
+SOURCE_OBSERVATIONS = "observations"
+SOURCE_FORECAST = "forecast"
+# A source this close to its next refresh is fetched together with the current one
+SCHEDULE_TOLERANCE = timedelta(seconds=30)
+
+# Shared observations document, kept in hass.data[DOMAIN][DATA_OBSERVATIONS].
+# The TTL stays below the scheduler's shortest retry so every fetch sees a
+# fresh document, while entries polling together share it.
+DATA_OBSERVATIONS = "observations"
+OBSERVATIONS_CACHE_TTL = timedelta(seconds=90)
+
+# Meteograms shared by entries whose forecast points fall into the same grid cell, kept in
+# hass.data[DOMAIN][DATA_FORECAST_CACHE]. Points are snapped to the nearest multiple of the step
+# (about 2 km north-south, 1 km east-west) and the meteogram of the snapped point is requested, so
+# every entry of a cell shares one request and one parse and gets the forecast for a point at most
+# half a step away. Cells in use are always kept; of the unused ones the FORECAST_CACHE_SIZE most
+# recent stay. The TTL matches the observations one.
+DATA_FORECAST_CACHE = "forecast_cache"
+FORECAST_GRID_STEP = 0.02
+FORECAST_CACHE_SIZE = 64
+FORECAST_CACHE_TTL = timedelta(seconds=90)
+
+# Update processing jobs running in the executor at once, over all entries, kept in
+# hass.data[DOMAIN][DATA_PROCESSING]. Parsing is CPU bound, so more parallel jobs only
+# compete with the event loop for the GIL instead of finishing sooner.
+DATA_PROCESSING = "processing"
+PROCESSING_CONCURRENCY = 2
+
+# The shared observations hub's metric sensors exist once, on one entry or fleet location at a
+# time; when it unloads, the next one takes them over. Kept in hass.data[DOMAIN][DATA_HUB_METRIC_SENSORS].
+DATA_HUB_METRIC_SENSORS = "hub_metric_sensors"
+
+# Fleet entries track many forecast locations, given as CSV lines, under one config entry. One
+# scheduler refreshes up to FLEET_CONCURRENCY locations at once; the observations document, the
+# forecast cache and the processing slots are shared as between separate entries.
+CONF_FLEET = "fleet"
+CONF_LOCATIONS = "locations"
+FLEET_CONCURRENCY = 8
+
+# Optional observation sensors are removed when their field has not been reported for this long.
+# When each field was last seen is stored at most this often.
+SENSOR_RETIRE_AFTER = timedelta(days=2)
+SENSOR_LAST_SEEN_SAVE_INTERVAL = timedelta(hours=1)
+
+# Last good payloads per entry, restored at startup so setup does not wait for the network
+STORAGE_VERSION = 1
+STORAGE_KEY_FORMAT = DOMAIN + ".{entry_id}.{payload}"
+STORAGE_SAVE_DELAY = 10
+# Stored next to the payloads: when the entry's optional observation fields were last seen
+STORAGE_SENSORS = "sensors"
+
+# Station positions and capabilities hardly ever change
+CATALOG_TTL = timedelta(hours=24)
+
+# Deadline in seconds for one request to an upstream endpoint
+FETCH_TIMEOUT = 20
+
+# Circuit breaker per upstream endpoint: consecutive failures before it opens,
+# and the exponential back-off (before jitter) it stays open for
+CIRCUIT_FAILURE_THRESHOLD = 3
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAX = timedelta(minutes=30)
+
+# Response-returning service with the full warning payloads, which are not recorded as attributes
+SERVICE_GET_WARNINGS = "get_warnings"
+ATTR_CONFIG_ENTRY = "config_entry"
+
 CONF_WARNING_OVERRIDE = "warning_override"
 DEFAULT_WARNING_OVERRIDE = True
 
@@ -25,5 +93,23 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9,et;q=0.8",
 }
 
+# Observation fields and the station XML elements they are read from
+STATION_FIELD_MAPPING = {
+    "temperature": "airtemperature",
+    "wind_speed": "windspeed",
+    "wind_speed_max": "windspeedmax",
+    "wind_bearing": "winddirection",
+    "ohuniiskus": "relativehumidity",
+    "ohurohk": "airpressure",
+    "sademed": "precipitations",
+    "veetase": "waterlevel",
+    "veetase_eh2000": "waterlevel_eh2000",
+    "veetemp": "watertemperature",
+    "visibility": "visibility",
+    "uvindex": "uvindex",
+    "sunshineduration": "sunshineduration",
+    "globalradiation": "globalradiation"
+}
+
 FORECAST_ONLY_ID = "Ainult prognoos"
 NO_SECONDARY_ID = "Puudub"
@@ -1,45 +1,101 @@
 # In /custom_components/ilmaprognoos/coordinator.py
 
-import async_timeout
+import asyncio
 from datetime import timedelta, datetime
 import json
 from collections import defaultdict
-import requests
-import xml.etree.ElementTree as ET
+from time import perf_counter
+from typing import NamedTuple
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.helpers.sun import is_up
 from homeassistant.util import dt as dt_util
 
 from .const import (
-    DOMAIN, LOGGER, XML_OBSERVATIONS_URL, FORECAST_URL_FORMAT,
-    HEADERS, DEFAULT_CURRENT_INTERVAL, DEFAULT_FORECAST_INTERVAL,
-    FORECAST_ONLY_ID, NO_SECONDARY_ID, CONF_WARNING_LEVELS, DEFAULT_WARNING_LEVELS
+    DOMAIN, LOGGER, FETCH_TIMEOUT,
+    DEFAULT_CURRENT_INTERVAL, DEFAULT_FORECAST_INTERVAL,
+    FORECAST_ONLY_ID, NO_SECONDARY_ID, CONF_WARNING_LEVELS, DEFAULT_WARNING_LEVELS,
+    SOURCE_OBSERVATIONS, SOURCE_FORECAST, SCHEDULE_TOLERANCE, DATA_PROCESSING, PROCESSING_CONCURRENCY,
+    STORAGE_VERSION, STORAGE_KEY_FORMAT, STORAGE_SAVE_DELAY, STORAGE_SENSORS
 )
+from .api import IlmaprognoosEndpoint, CircuitOpenError
+from .conditions import classify_condition
+from .ephemeris import SunEphemeris
+from .forecast import ForecastProducts, HourlyForecast
+from .forecast_cache import CachedForecast, async_get_forecast_cache
+from .metrics import (
+    UpdateMetrics, STAGE_FETCH_FORECAST, STAGE_FORECAST_BYTES, STAGE_FORECAST_PROCESSING,
+    STAGE_DERIVED, STAGE_ENTITY_WRITES, STAGE_UPDATE, STAGE_LOOP_BLOCKING
+)
+from .observations import async_get_observations_hub
+from .scheduler import PublicationSchedule
 
-def fetch_data_sync(xml_url, forecast_url, headers):
-    """Fetch data using requests."""
-    xml_text = None
-    if xml_url:
-        xml_res = requests.get(xml_url, headers=headers, timeout=20)
-        xml_res.raise_for_status()
-        xml_text = xml_res.text
-        
-    forecast_res = requests.get(forecast_url, headers=headers, timeout=20)
-    forecast_res.raise_for_status()
-    
-    return xml_text, forecast_res.json()
+def payload_store(hass: HomeAssistant, entry_id: str, payload: str) -> Store:
+    """Return the store an entry or fleet location keeps one kind of payload in."""
+    return Store(hass, STORAGE_VERSION, STORAGE_KEY_FORMAT.format(entry_id=entry_id, payload=payload))
+
+
+def _processing_slots(hass: HomeAssistant) -> asyncio.Semaphore:
+    """Return the semaphore limiting concurrent processing jobs of all entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PROCESSING not in domain_data:
+        domain_data[DATA_PROCESSING] = asyncio.Semaphore(PROCESSING_CONCURRENCY)
+    return domain_data[DATA_PROCESSING]
+
+
+async def async_remove_stored_payloads(hass: HomeAssistant, entry_id: str) -> None:
+    for payload in (SOURCE_FORECAST, SOURCE_OBSERVATIONS, STORAGE_SENSORS):
+        await payload_store(hass, entry_id, payload).async_remove()
+
+
+def _diff_data(old: dict | None, new: dict) -> frozenset:
+    """Return the keys of new that differ from old.
+
+    Top-level products are compared by identity first, since unchanged
+    products are reused between updates. Fields of "current" are reported
+    individually as "current.<field>".
+    """
+    if old is None:
+        return frozenset(new) | frozenset(f"current.{field}" for field in new.get("current", {}))
+    changed = set()
+    for key, value in new.items():
+        old_value = old.get(key)
+        if value is old_value: continue
+        if key == "current":
+            fields = {field for field in value.keys() | old_value.keys() if value.get(field) != old_value.get(field)}
+            if fields:
+                changed.add(key)
+                changed.update(f"current.{field}" for field in fields)
+        elif value != old_value:
+            changed.add(key)
+    return frozenset(changed)
+
+
+class UpdateResult(NamedTuple):
+    """What the processing job of an update hands back to the event loop; None fields are reused from the previous data."""
+    forecast: ForecastProducts
+    forecast_changed: bool
+    current: dict | None
+    sunshine: dict | None
+    precipitation_forecast: dict | None
+    # (stage, milliseconds) measured inside the job
+    timings: tuple
 
 
 class IlmaprognoosDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the API."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
-        """Initialize."""
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, location: dict | None = None):
+        """Initialize; location is one location of a fleet entry, which has no timer of its own."""
         self.config_entry = entry
-        config_data = entry.data
+        # The entry's own data, or the location's for a fleet
+        self.config_data = config_data = entry.data if location is None else location
+        self.in_fleet = location is not None
+        # Prefix of unique ids and storage keys; a fleet location's includes its slug
+        self.location_id = entry.entry_id if location is None else f"{entry.entry_id}_{location['slug']}"
+        self.device_name = entry.title if location is None else location["location_name"]
         
         self.location_name = config_data.get("location_name", "Unknown")
         self.primary_station = config_data.get("primary_station")
@@ -47,12 +103,41 @@ class IlmaprognoosDataUpdateCoordinator(DataUpdateCoordinator):
         self.coords = config_data.get("coords")
         
         self.is_forecast_only = (self.primary_station == FORECAST_ONLY_ID)
-        self.xml_url = None if self.is_forecast_only else XML_OBSERVATIONS_URL
-        self.forecast_url = FORECAST_URL_FORMAT.format(coords=self.coords)
+        self.ephemeris = SunEphemeris(*self._location(hass), hass.config.elevation)
+        self.observations = async_get_observations_hub(hass)
+        # Entries in the same forecast grid cell share one download and one parse
+        self.forecast_cache = async_get_forecast_cache(hass)
+        self._forecast_cell = self.forecast_cache.acquire(self.coords)
+        self._holds_cell = True
+        self._forecast_products = None
+        self._station_data = {}
+        self._observations_version = None
+        self._forecast_version = None
+        self._derived_date = None
+
+        # Last good payloads on disk; data restored from them is stale until the first successful refresh
+        self._forecast_store = payload_store(hass, self.location_id, SOURCE_FORECAST)
+        self._stations_store = payload_store(hass, self.location_id, SOURCE_OBSERVATIONS)
+        self.is_stale = False
+        self.stored_at = None
+
+        # Observations and forecast are refreshed on their own learned publication schedules
+        self.sources = (SOURCE_FORECAST,) if self.is_forecast_only else (SOURCE_OBSERVATIONS, SOURCE_FORECAST)
+        self.schedules = {}
+        # When the next refresh is planned; None means now
+        self.next_refresh = None
+        self.updated_sources = frozenset()
+        # Keys of data changed by the last update, and entity writes skipped because nothing they show changed
+        self.changed_keys = frozenset()
+        self.skipped_writes = 0
+        self.entity_writes = 0
+        # Rolling cost of every update stage; the shared observations stages are in self.observations.metrics
+        self.metrics = UpdateMetrics()
         
         slug = config_data.get("slug", "unknown")
         self.weather_entity_id = f"weather.{slug}_ilm"
-        self.status_entity_id = f"binary_sensor.{slug}_uuendamise_staatus"
+        # Fleet locations report to the fleet's status sensor
+        self.status_entity_id = f"binary_sensor.{entry.data.get('slug', 'unknown') if self.in_fleet else slug}_uuendamise_staatus"
         
         self.api_fetch_error = False
         self.last_error_reason = None
@@ -60,63 +145,172 @@ class IlmaprognoosDataUpdateCoordinator(DataUpdateCoordinator):
         super().__init__(hass, LOGGER, name=DOMAIN)
         self._update_interval_from_options()
 
+    @property
+    def forecast_endpoint(self) -> IlmaprognoosEndpoint:
+        """The endpoint of the entry's forecast grid cell, shared with the other entries in it."""
+        return self._forecast_cell.endpoint
+
+    @property
+    def forecast_cell(self) -> str:
+        """Grid-snapped coordinates the forecast is fetched for."""
+        return self._forecast_cell.key
+
+    def _endpoint(self, source: str) -> IlmaprognoosEndpoint:
+        return self.observations.endpoint if source == SOURCE_OBSERVATIONS else self.forecast_endpoint
+
+    def _location(self, hass: HomeAssistant) -> tuple:
+        """Return (latitude, longitude) of the forecast point, falling back to the home location."""
+        try:
+            lat_str, lon_str = self.coords.replace(',', '.').split(';')
+            return float(lat_str), float(lon_str)
+        except (AttributeError, ValueError):
+            return hass.config.latitude, hass.config.longitude
+
     def _update_interval_from_options(self):
         forecast_minutes = self.config_entry.options.get("forecast_interval", DEFAULT_FORECAST_INTERVAL.seconds // 60)
-        if self.is_forecast_only: 
-            final_interval = forecast_minutes
-        else:
-            current_minutes = self.config_entry.options.get("current_interval", DEFAULT_CURRENT_INTERVAL.seconds // 60)
-            final_interval = min(current_minutes, forecast_minutes)
-        self.update_interval = timedelta(minutes=final_interval)
+        current_minutes = self.config_entry.options.get("current_interval", DEFAULT_CURRENT_INTERVAL.seconds // 60)
+        intervals = {
+            SOURCE_OBSERVATIONS: timedelta(minutes=current_minutes),
+            SOURCE_FORECAST: timedelta(minutes=forecast_minutes),
+        }
+        for source in self.sources:
+            schedule = self.schedules.setdefault(source, PublicationSchedule(intervals[source]))
+            schedule.interval = intervals[source]
+            # Everything is due on the next refresh; afterwards each source follows its own schedule
+            schedule.reset()
+        self.next_refresh = None
+        # Fleet locations are refreshed by the fleet's scheduler instead of a timer of their own
+        if not self.in_fleet:
+            self.update_interval = min(intervals[source] for source in self.sources)
 
-    async def async_update_intervals(self):
+    @callback
+    def async_apply_options(self) -> None:
         self._update_interval_from_options()
+        # Warning levels may have changed, so the cached forecast must be reprocessed
+        self._forecast_products = None
+
+    async def async_update_intervals(self):
+        self.async_apply_options()
         await self.async_request_refresh()
 
+    def _due_sources(self, now) -> set:
+        due = {source for source in self.sources if self.schedules[source].is_due(now, SCHEDULE_TOLERANCE)}
+        if self._forecast_products is None:
+            due.add(SOURCE_FORECAST)
+        # A refresh requested between schedules (e.g. homeassistant.update_entity) refreshes everything
+        return due or set(self.sources)
+
+    def _schedule_next_refresh(self, now) -> None:
+        next_fetch = min(self.schedules[source].next_fetch or now for source in self.sources)
+        self.next_refresh = max(next_fetch, now + SCHEDULE_TOLERANCE)
+        if not self.in_fleet:
+            self.update_interval = self.next_refresh - now
+
+    async def async_shutdown(self) -> None:
+        """Stop refreshing and let go of the forecast cell and the observed stations."""
+        await super().async_shutdown()
+        self.observations.release(self.location_id)
+        if self._holds_cell:
+            self._holds_cell = False
+            self.forecast_cache.release(self._forecast_cell)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        writes = self.entity_writes
+        super().async_update_listeners()
+        self.metrics.add(STAGE_ENTITY_WRITES, self.entity_writes - writes)
+
     async def _async_update_data(self):
-        last_success_time = getattr(self, "last_update_success_timestamp", None)
-        if self.last_update_success and last_success_time and (dt_util.utcnow() - last_success_time < timedelta(seconds=60)):
-            return self.data
+        started = perf_counter()
+        awaited = 0.0
+
+        async def wait(awaitable):
+            nonlocal awaited
+            wait_started = perf_counter()
+            try: return await awaitable
+            finally: awaited += perf_counter() - wait_started
+
+        now = dt_util.utcnow()
+        due = self._due_sources(now)
+        fetched = frozenset(due)
+        self.updated_sources = frozenset()
+        self.changed_keys = frozenset()
 
         try:
-            xml_text, forecast_json = await self.hass.async_add_executor_job(
-                fetch_data_sync, self.xml_url, self.forecast_url, HEADERS
-            )
+            station_data, forecast = await wait(self._async_fetch(due))
+            if station_data is not None and self.primary_station not in station_data and await wait(self._async_follow_renamed_stations()):
+                station_data = await wait(self.observations.async_get_stations(self.location_id, self._station_names()))
 
-            hourly_forecast = self._process_hourly_forecast(forecast_json)
-            
-            if not hourly_forecast and getattr(self, "data", None) is not None:
-                raise UpdateFailed("Prognoosi andmed puuduvad (tühi JSON).")
-            
-            current_data = {}
-            if xml_text:
-                current_data = self._parse_xml_observations(xml_text)
-            
-            final_current_data = self._merge_current_with_forecast(current_data, hourly_forecast)
-            
-            sunshine_forecast = self._process_sunshine_forecast(hourly_forecast)
-            precipitation_forecast = self._process_precipitation_forecast(hourly_forecast)
+            # Sources that came back unchanged do not count as refreshed for the entities
+            if station_data is not None:
+                observations_version = self.observations.station_versions(self._station_names())
+                if observations_version == self._observations_version:
+                    due.discard(SOURCE_OBSERVATIONS)
+                else:
+                    self._station_data = station_data
+                    self._observations_version = observations_version
+
+            # The cell's forecast is new to this entry when its content differs from the one the data was built
+            # from, or when changed options cleared the products. None means not due.
+            if forecast is not None and forecast.version == self._forecast_version and self._forecast_products is not None:
+                forecast = None
+
+            # Everything derived from the payloads is computed in one executor job; the loop only hands the result over
+            today = dt_util.now().date()
+            result = await wait(self._async_run(
+                self._process_update, forecast.products if forecast is not None else None, self._forecast_products,
+                self._station_data, SOURCE_OBSERVATIONS in due or self.data is None,
+                today != self._derived_date or self.data is None, self.data is not None,
+            ))
+            for stage, elapsed in result.timings:
+                self.metrics.add(stage, elapsed)
+
+            if result.forecast_changed:
+                self._forecast_products = result.forecast
+                self._forecast_version = forecast.version
+            else:
+                due.discard(SOURCE_FORECAST)
+
+            # Whether a fetch brought new content is what the schedules learn the publication cadence from
+            for source in fetched:
+                self.schedules[source].record(now, source in due)
+            self._schedule_next_refresh(now)
+
+            final_current_data = result.current if result.current is not None else self.data["current"]
+            if result.sunshine is not None:
+                sunshine_forecast = result.sunshine
+                precipitation_forecast = result.precipitation_forecast
+                self._derived_date = today
+                due.add(SOURCE_FORECAST)
+            else:
+                sunshine_forecast = self.data["sunshine"]
+                precipitation_forecast = self.data["precipitation_forecast"]
 
-            self.hass.bus.async_fire("logbook_entry", {"message": "Uuendamine õnnestus", "entity_id": self.status_entity_id, "domain": DOMAIN})
+            # A fleet round would log every location; the fleet's status sensor shows the outcome instead
+            if not self.in_fleet:
+                self.hass.bus.async_fire("logbook_entry", {"message": "Uuendamine õnnestus", "entity_id": self.status_entity_id, "domain": DOMAIN})
 
             self.api_fetch_error = False
             self.last_error_reason = None
+            self.updated_sources = frozenset(due)
+            self.is_stale = False
+            self._async_save(station_data if SOURCE_OBSERVATIONS in due else None, forecast.body if result.forecast_changed else None)
 
-            return {
-                "current": final_current_data,
-                "daily": self._process_daily_forecast(forecast_json),
-                "hourly": hourly_forecast,
-                "warnings": self._process_warnings(forecast_json),
-                "location": self.location_name,
-                "sunshine": sunshine_forecast,
-                "precipitation_forecast": precipitation_forecast
-            }
+            data = self._compose_data(final_current_data, sunshine_forecast, precipitation_forecast)
+            self.changed_keys = _diff_data(self.data, data)
+            elapsed = perf_counter() - started
+            self.metrics.add(STAGE_UPDATE, elapsed * 1000)
+            self.metrics.add(STAGE_LOOP_BLOCKING, (elapsed - awaited) * 1000)
+            return data
         except Exception as err:
             self.api_fetch_error = True
             self.last_error_reason = str(err)
+            for source in fetched:
+                self.schedules[source].record_failure(now, self._endpoint(source).retry_at)
+            self._schedule_next_refresh(now)
             
             self.hass.bus.async_fire("logbook_entry", {
-                "message": f"ebaõnnestus: {err}",
+                "message": f"{self.location_name}: ebaõnnestus: {err}" if self.in_fleet else f"ebaõnnestus: {err}",
                 "entity_id": self.status_entity_id,
                 "domain": DOMAIN,
             })
@@ -127,141 +321,225 @@ class IlmaprognoosDataUpdateCoordinator(DataUpdateCoordinator):
                 
             raise UpdateFailed(f"An unexpected error occurred: {err}")
 
-    def _translate_phenomenon(self, eng_text):
-        translations = {
-            "clear": "Selge",
-            "few clouds": "Vähene pilvisus",
-            "variable clouds": "Poolpilves",
-            "cloudy with clear spells": "Peamiselt pilves",
-            "overcast": "Pilves",
-            "light snow shower": "Nõrk hooglumi",
-            "moderate snow shower": "Mõõdukas hooglumi",
-            "heavy snow shower": "Tugev hooglumi",
-            "light shower": "Nõrk hoovihm",
-            "moderate shower": "Mõõdukas hoovihm",
-            "heavy shower": "Tugev hoovihm",
-            "light rain": "Nõrk vihm",
-            "moderate rain": "Mõõdukas vihm",
-            "heavy rain": "Tugev vihm",
-            "glaze": "Jäide",
-            "light sleet": "Nõrk lörtsisadu",
-            "moderate sleet": "Mõõdukas lörtsisadu",
-            "light snowfall": "Nõrk lumesadu",
-            "moderate snowfall": "Mõõdukas lumesadu",
-            "heavy snowfall": "Tugev lumesadu",
-            "hail": "Rahe",
-            "mist": "Uduvine",
-            "fog": "Udu"
-        }
-        return translations.get(eng_text.lower().strip(), eng_text).capitalize()
-
-    def _extract_station_data(self, station_element):
-        data = {}
-        mapping = {
-            "temperature": "airtemperature",
-            "wind_speed": "windspeed",
-            "wind_speed_max": "windspeedmax",
-            "wind_bearing": "winddirection",
-            "ohuniiskus": "relativehumidity",
-            "ohurohk": "airpressure",
-            "sademed": "precipitations",
-            "veetase": "waterlevel",
-            "veetase_eh2000": "waterlevel_eh2000",
-            "veetemp": "watertemperature",
-            "visibility": "visibility",
-            "uvindex": "uvindex",
-            "sunshineduration": "sunshineduration",
-            "globalradiation": "globalradiation"
+    async def _async_run(self, func, *args):
+        """Run a processing job in the executor, at most PROCESSING_CONCURRENCY of them over all entries."""
+        async with _processing_slots(self.hass):
+            return await self.hass.async_add_executor_job(func, *args)
+
+    def _process_update(self, shared: ForecastProducts | None, forecast: ForecastProducts | None,
+                        station_data: dict, merge_current: bool, rederive: bool, has_data: bool) -> UpdateResult:
+        """Derive everything an update needs from the parsed payloads. Runs in the executor.
+
+        shared is the grid cell's newly parsed forecast, None when the entry
+        keeps its current one. The job only reads the coordinator's
+        configuration and returns new objects; the products it gets are
+        shared or previous ones and are never modified.
+        """
+        forecast_changed = shared is not None
+        if forecast_changed:
+            if not shared.hourly and has_data:
+                raise UpdateFailed("Prognoosi andmed puuduvad (tühi JSON).")
+            # The cell keeps every warning; the levels are this entry's option
+            forecast = shared._replace(warnings=self._process_warnings(shared.warnings))
+
+        started = perf_counter()
+        current = sunshine = precipitation = None
+        if merge_current or forecast_changed:
+            current = self._merge_current_with_forecast(self._merge_station_data(station_data), forecast.hourly)
+        # Daily sums only change with a new forecast or when the local date rolls over
+        if forecast_changed or rederive:
+            sunshine = self._process_sunshine_forecast(forecast.hourly)
+            precipitation = self._process_precipitation_forecast(forecast.hourly)
+        return UpdateResult(forecast, forecast_changed, current, sunshine, precipitation, ((STAGE_DERIVED, (perf_counter() - started) * 1000),))
+
+    def _compose_data(self, current_data: dict, sunshine_forecast: dict, precipitation_forecast: dict) -> dict:
+        return {
+            "current": current_data,
+            "daily": self._forecast_products.daily,
+            "hourly": self._forecast_products.hourly,
+            "warnings": self._forecast_products.warnings,
+            "location": self.location_name,
+            "sunshine": sunshine_forecast,
+            "precipitation_forecast": precipitation_forecast
         }
-        for our_key, xml_key in mapping.items():
-            val = station_element.findtext(xml_key)
-            if val is not None and val.strip() != "":
-                try: 
-                    parsed_val = float(val)
-                    if our_key == "sunshineduration":
-                        data[our_key] = round(parsed_val / 60.0, 1)
-                    else:
-                        data[our_key] = parsed_val
-                except ValueError: 
-                    pass
-                
-        phenom = station_element.findtext("phenomenon")
-        if phenom and phenom.strip():
-            data["phenomenon"] = self._translate_phenomenon(phenom.strip())
 
-        return data
+    async def async_restore(self) -> bool:
+        """Rebuild data from the payloads stored by the last successful update.
 
-    def _parse_xml_observations(self, xml_text):
+        Returns False when there is no usable forecast on disk, in which case
+        the caller has to wait for a network refresh instead.
+        """
+        stored = await self._forecast_store.async_load()
+        if not stored or not stored.get("body"): return False
+        station_data = {}
+        if not self.is_forecast_only:
+            station_data = (await self._stations_store.async_load() or {}).get("stations", {})
+        forecast_body = stored["body"].encode()
         try:
-            root = ET.fromstring(xml_text)
-            primary_data = {}
-            secondary_data = {}
-            
-            for station in root.findall('station'):
-                name = station.findtext('name')
-                if name == self.primary_station:
-                    primary_data = self._extract_station_data(station)
-                elif name == self.secondary_station and self.secondary_station != NO_SECONDARY_ID:
-                    secondary_data = self._extract_station_data(station)
-            
-            merged = secondary_data.copy()
-            merged.update(primary_data)
-            return merged
-        except Exception as e:
-            LOGGER.warning(f"Failed to parse XML: {e}")
-            return {}
+            shared = await self._async_run(self._process_forecast, forecast_body)
+            if not shared.hourly: return False
+            result = await self._async_run(self._process_update, shared, None, station_data, True, True, False)
+        except Exception as err:
+            LOGGER.warning(f"Stored forecast for {self.location_name} could not be restored: {err}")
+            return False
+
+        self._forecast_products = result.forecast
+        self._forecast_version = hash(forecast_body)
+        self._station_data = station_data
+        # A 304 on the first refresh keeps the restored forecast, unless another entry already filled the cell
+        self._forecast_cell.seed(forecast_body, shared, stored.get("etag"), stored.get("last_modified"))
+        self._derived_date = dt_util.now().date()
+        self.is_stale = True
+        self.stored_at = stored.get("saved_at")
+        self.async_set_updated_data(self._compose_data(result.current, result.sunshine, result.precipitation_forecast))
+        return True
+
+    def _async_save(self, station_data: dict | None, forecast_body: bytes | None) -> None:
+        """Schedule writing the payloads that changed in this update."""
+        saved_at = dt_util.utcnow().isoformat()
+        if station_data is not None:
+            self._stations_store.async_delay_save(lambda: {"stations": station_data, "saved_at": saved_at}, STORAGE_SAVE_DELAY)
+        if forecast_body is not None:
+            stored = {
+                "body": forecast_body.decode(),
+                "etag": self.forecast_endpoint.etag,
+                "last_modified": self.forecast_endpoint.last_modified,
+                "saved_at": saved_at,
+            }
+            self._forecast_store.async_delay_save(lambda: stored, STORAGE_SAVE_DELAY)
+
+    async def _async_fetch(self, due):
+        """Fetch the due sources concurrently; skipped sources return None.
+
+        Every endpoint request has its own FETCH_TIMEOUT deadline and circuit breaker.
+        """
+        async def fetch_stations():
+            if SOURCE_OBSERVATIONS not in due: return None
+            return await self.observations.async_get_stations(self.location_id, self._station_names())
+
+        async def fetch_forecast() -> CachedForecast | None:
+            if SOURCE_FORECAST not in due: return None
+            with self.metrics.time(STAGE_FETCH_FORECAST):
+                forecast = await self._forecast_cell.async_get(self._async_parse_forecast)
+            self.metrics.add(STAGE_FORECAST_BYTES, forecast.response_bytes)
+            if forecast.processing_ms:
+                self.metrics.add(STAGE_FORECAST_PROCESSING, forecast.processing_ms)
+            return forecast
 
-    def _merge_current_with_forecast(self, current_data: dict, hourly_forecast: list) -> dict:
+        try:
+            return await asyncio.gather(fetch_stations(), fetch_forecast())
+        except TimeoutError as err:
+            raise UpdateFailed(f"Päring aegus ({FETCH_TIMEOUT} s).") from err
+        except CircuitOpenError as err:
+            raise UpdateFailed(str(err)) from err
+
+    async def _async_follow_renamed_stations(self) -> bool:
+        """Find configured stations missing from the observations by their WMO code; True if a name changed."""
+        catalog = await self.observations.async_get_catalog()
+        renamed = False
+        for attr, wmocode_key in (("primary_station", "primary_wmocode"), ("secondary_station", "secondary_wmocode")):
+            name = getattr(self, attr)
+            station = catalog.by_wmocode(self.config_data.get(wmocode_key))
+            if station is not None and station.name != name and name not in catalog:
+                LOGGER.warning(f"Station '{name}' is now reported as '{station.name}' (WMO {station.wmocode})")
+                setattr(self, attr, station.name)
+                renamed = True
+        return renamed
+
+    def _station_names(self):
+        names = [self.primary_station]
+        if self.secondary_station and self.secondary_station != NO_SECONDARY_ID:
+            names.append(self.secondary_station)
+        return names
+
+    def _merge_station_data(self, station_data: dict) -> dict:
+        merged = station_data.get(self.secondary_station, {}).copy() if self.secondary_station != NO_SECONDARY_ID else {}
+        merged.update(station_data.get(self.primary_station, {}))
+        return merged
+
+    def _merge_current_with_forecast(self, current_data: dict, hourly_forecast: HourlyForecast) -> dict:
         if not hourly_forecast: return current_data
         first_hour = hourly_forecast[0]
         final_data = current_data.copy()
         
-        if final_data.get("temperature") is None: final_data["temperature"] = first_hour.get("temperature")
-        if final_data.get("sademed") is None: final_data["sademed"] = first_hour.get("precipitation")
-        if final_data.get("wind_speed") is None: final_data["wind_speed"] = first_hour.get("wind_speed")
-        if final_data.get("wind_bearing") is None: final_data["wind_bearing"] = first_hour.get("wind_bearing")
-        if final_data.get("ohurohk") is None: final_data["ohurohk"] = first_hour.get("pressure")
-        if final_data.get("phenomenon") is None: final_data["phenomenon"] = first_hour.get("condition_text_et", "").capitalize()
+        if final_data.get("temperature") is None: final_data["temperature"] = first_hour.temperature
+        if final_data.get("sademed") is None: final_data["sademed"] = first_hour.precipitation
+        if final_data.get("wind_speed") is None: final_data["wind_speed"] = first_hour.wind_speed
+        if final_data.get("wind_bearing") is None: final_data["wind_bearing"] = first_hour.wind_bearing
+        if final_data.get("ohurohk") is None: final_data["ohurohk"] = first_hour.pressure
+        if final_data.get("phenomenon") is None: final_data["phenomenon"] = first_hour.condition_text_et.capitalize()
         
         if final_data.get("tuul") is None:
-            wind_dir_name = first_hour.get("wind_bearing_name")
-            wind_speed_ms = first_hour.get("wind_speed")
+            wind_dir_name = first_hour.wind_bearing_name
+            wind_speed_ms = first_hour.wind_speed
             if wind_dir_name is not None and wind_speed_ms is not None:
                 final_data["tuul"] = f"{wind_dir_name} {wind_speed_ms} m/s"
         return final_data
 
-    def _process_daily_forecast(self, api_data):
+    async def _async_parse_forecast(self, forecast_body: bytes) -> ForecastProducts:
+        return await self._async_run(self._process_forecast, forecast_body)
+
+    def _process_forecast(self, forecast_body: bytes) -> ForecastProducts:
+        """Parse a meteogram into products that do not depend on the entry's options, so grid cell neighbours can share them."""
+        forecast_json = json.loads(forecast_body)
+        hourly = self._process_hourly_forecast(forecast_json)
+        return ForecastProducts(hourly, self._process_daily_forecast(hourly), self._decode_warnings(forecast_json))
+
+    def _process_hourly_forecast(self, api_data) -> HourlyForecast:
+        """Normalize the meteogram in a single pass into columnar storage.
+
+        Every derived product and the weather entity read the result, so each
+        timestamp is parsed and localized exactly once per download.
+        """
+        final_forecast = HourlyForecast()
         try:
-            hourly_forecasts = api_data.get("forecast", {}).get("tabular", {}).get("time",[])
-            if not hourly_forecasts: return []
-            daily_data = defaultdict(lambda: {"temps": [], "conditions":[], "precip":[]})
-            for hour in hourly_forecasts:
+            raw_hourly = api_data.get("forecast", {}).get("tabular", {}).get("time", [])
+            for hour in raw_hourly:
                 try:
-                    dt_object = datetime.fromisoformat(hour.get("@attributes", {}).get("from", ""))
-                    date_key = dt_object.date().isoformat()
-                    
-                    temp = hour.get("temperature", {}).get("@attributes", {}).get("value")
-                    if temp is not None: daily_data[date_key]["temps"].append(float(temp))
-                    
-                    cond = hour.get("phenomen", {}).get("@attributes", {}).get("et")
-                    if cond: daily_data[date_key]["conditions"].append(cond)
-                    
-                    precip = hour.get("precipitation", {}).get("@attributes", {}).get("value")
-                    if precip is not None: daily_data[date_key]["precip"].append(float(precip))
+                    dt_str = hour.get("@attributes", {}).get("from")
+                    if not dt_str: continue
+                    condition_text_et = hour.get("phenomen", {}).get("@attributes", {}).get("et", "").lower()
+                    wind_direction = hour.get("windDirection", {}).get("@attributes", {})
+                    # Convert everything before appending so a bad hour leaves no partial row
+                    values = (
+                        dt_util.as_local(datetime.fromisoformat(dt_str)),
+                        float(hour.get("temperature", {}).get("@attributes", {}).get("value", 0)),
+                        classify_condition(condition_text_et),
+                        condition_text_et,
+                        float(hour.get("precipitation", {}).get("@attributes", {}).get("value", 0)),
+                        float(hour.get("windSpeed", {}).get("@attributes", {}).get("mps", 0)),
+                        float(wind_direction.get("deg", 0)),
+                        wind_direction.get("name", ""),
+                        float(hour.get("pressure", {}).get("@attributes", {}).get("value", 0)),
+                    )
                 except Exception: continue
+                final_forecast.append(*values)
+            return final_forecast
+        except Exception as e:
+            LOGGER.warning(f"Failed to process hourly forecast: {e}")
+            return HourlyForecast()
+
+    def _process_daily_forecast(self, hourly_forecast: HourlyForecast) -> list:
+        try:
+            daily_data = defaultdict(lambda: {"temps": [], "conditions":[], "precip":[]})
+            for time, temp, cond, precip in zip(hourly_forecast.times, hourly_forecast.temperature,
+                                                hourly_forecast.condition_texts_et, hourly_forecast.precipitation):
+                day = daily_data[time.date()]
+                day["temps"].append(temp)
+                if cond: day["conditions"].append(cond)
+                day["precip"].append(precip)
 
             final_forecast_list =[]
-            for date_iso, data in sorted(daily_data.items()):
-                if not data["temps"]: continue
-                day_conditions = [c for c in data["conditions"] if "selge" not in c.lower() and "vähene" not in c.lower()]
+            for date, data in sorted(daily_data.items()):
+                day_conditions = [c for c in data["conditions"] if "selge" not in c and "vähene" not in c]
                 if not day_conditions: day_conditions = data["conditions"]
                 dominant_condition = max(set(day_conditions), key=day_conditions.count) if day_conditions else ""
                 
                 forecast_day = {
-                    "datetime": date_iso, 
+                    "datetime": dt_util.as_local(datetime.combine(date, datetime.min.time())),
                     "temperature": max(data["temps"]), 
                     "templow": min(data["temps"]), 
-                    "condition": self._map_condition(dominant_condition.lower()), 
+                    "condition": classify_condition(dominant_condition), 
                     "precipitation": sum(data["precip"])
                 }
                 final_forecast_list.append(forecast_day)
@@ -270,44 +548,13 @@ class IlmaprognoosDataUpdateCoordinator(DataUpdateCoordinator):
             LOGGER.warning(f"Failed to process daily forecast: {e}")
             return[]
 
-    def _process_hourly_forecast(self, api_data):
-        try:
-            raw_hourly = api_data.get("forecast", {}).get("tabular", {}).get("time", [])
-            if not raw_hourly: return []
-            final_forecast_list =[]
-            for hour in raw_hourly:
-                try:
-                    condition_text_et = hour.get("phenomen", {}).get("@attributes", {}).get("et", "")
-                    forecast_hour = {
-                        "datetime": hour.get("@attributes", {}).get("from"),
-                        "temperature": float(hour.get("temperature", {}).get("@attributes", {}).get("value", 0)),
-                        "condition": self._map_condition(condition_text_et.lower()),
-                        "condition_text_et": condition_text_et.lower(),
-                        "precipitation": float(hour.get("precipitation", {}).get("@attributes", {}).get("value", 0)),
-                        "wind_speed": float(hour.get("windSpeed", {}).get("@attributes", {}).get("mps", 0)),
-                        "wind_bearing": float(hour.get("windDirection", {}).get("@attributes", {}).get("deg", 0)),
-                        "wind_bearing_name": hour.get("windDirection", {}).get("@attributes", {}).get("name", ""),
-                        "pressure": float(hour.get("pressure", {}).get("@attributes", {}).get("value", 0))
-                    }
-                    if forecast_hour["datetime"]:
-                        final_forecast_list.append(forecast_hour)
-                except Exception: continue
-            return final_forecast_list
-        except Exception as e:
-            LOGGER.warning(f"Failed to process hourly forecast: {e}")
-            return[]
-
-    def _process_sunshine_forecast(self, hourly_forecast: list) -> dict:
+    def _process_sunshine_forecast(self, hourly_forecast: HourlyForecast) -> dict:
         sunshine_map = {"selge": 60, "vähene pilvisus": 50, "vahelduv pilvisus": 30, "pilves selgimistega": 15}
         daily_sunshine_minutes = defaultdict(int)
-        for hour in hourly_forecast:
-            try:
-                timestamp = dt_util.as_local(datetime.fromisoformat(hour["datetime"]))
-                if is_up(self.hass, timestamp):
-                    condition = hour.get("condition_text_et", "")
-                    sun_minutes = sunshine_map.get(condition, 0)
-                    if sun_minutes > 0: daily_sunshine_minutes[timestamp.date()] += sun_minutes
-            except (ValueError, KeyError): continue
+        for time, condition in zip(hourly_forecast.times, hourly_forecast.condition_texts_et):
+            sun_minutes = sunshine_map.get(condition, 0)
+            if sun_minutes > 0 and self.ephemeris.is_up(time):
+                daily_sunshine_minutes[time.date()] += sun_minutes
             
         today = dt_util.now().date()
         return {
@@ -317,14 +564,10 @@ class IlmaprognoosDataUpdateCoordinator(DataUpdateCoordinator):
             "day_3": round(daily_sunshine_minutes.get(today + timedelta(days=3), 0) / 60, 1),
         }
 
-    def _process_precipitation_forecast(self, hourly_forecast: list) -> dict:
+    def _process_precipitation_forecast(self, hourly_forecast: HourlyForecast) -> dict:
         daily_precipitation_mm = defaultdict(float)
-        for hour in hourly_forecast:
-            try:
-                timestamp = dt_util.as_local(datetime.fromisoformat(hour["datetime"]))
-                precipitation = hour.get("precipitation", 0.0)
-                daily_precipitation_mm[timestamp.date()] += precipitation
-            except (ValueError, KeyError): continue
+        for time, precipitation in zip(hourly_forecast.times, hourly_forecast.precipitation):
+            daily_precipitation_mm[time.date()] += precipitation
             
         today = dt_util.now().date()
         return {
@@ -334,7 +577,7 @@ class IlmaprognoosDataUpdateCoordinator(DataUpdateCoordinator):
             "day_3": round(daily_precipitation_mm.get(today + timedelta(days=3), 0.0), 1),
         }
 
-    def _process_warnings(self, api_data):
+    def _decode_warnings(self, api_data) -> list:
         try:
             warnings_raw = api_data.get("warnings")
             if not warnings_raw or warnings_raw == "[]": 
@@ -345,7 +588,15 @@ class IlmaprognoosDataUpdateCoordinator(DataUpdateCoordinator):
                 warnings_data = json.loads(warnings_raw)
             else:
                 warnings_data = warnings_raw
+            return warnings_data if isinstance(warnings_data, list) else []
+        except Exception as e:
+            LOGGER.warning(f"Failed to decode warnings: {e}")
+            return []
 
+    def _process_warnings(self, warnings_data: list) -> list:
+        if not warnings_data:
+            return []
+        try:
             selected_levels = [
                 str(lvl) for lvl in self.config_entry.options.get(
                     CONF_WARNING_LEVELS, DEFAULT_WARNING_LEVELS
@@ -373,22 +624,3 @@ class IlmaprognoosDataUpdateCoordinator(DataUpdateCoordinator):
         except Exception as e:
             LOGGER.warning(f"Failed to process warnings: {e}")
             return []
-        
-    def _map_condition(self, condition_text):
-        if not condition_text: return "cloudy"
-        c = condition_text.lower()
-        
-        if "clear spells" in c or "peamiselt pilves" in c or "selgimistega" in c: return "partlycloudy"
-        if "few clouds" in c or "vähene pilvisus" in c: return "partlycloudy"
-        if "variable clouds" in c or "poolpilves" in c or "vahelduv pilvisus" in c: return "partlycloudy"
-        
-        if any(x in c for x in ["lörts", "sleet", "jäide", "glaze"]): return "snowy-rainy"
-        if any(x in c for x in ["lumi", "snow", "snowfall"]): return "snowy"
-        if any(x in c for x in ["vihm", "rain", "shower"]): return "pouring" if "heavy" in c or "tugev" in c else "rainy"
-        if any(x in c for x in ["äike", "thunder", "hail", "rahe"]): return "lightning-rainy"
-        if any(x in c for x in ["udu", "fog", "mist"]): return "fog"
-        
-        if any(x in c for x in ["selge", "clear"]): return "clear"
-        if any(x in c for x in ["pilves", "cloudy", "overcast"]): return "cloudy"
-        
-        return "cloudy"
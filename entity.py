@@ -0,0 +1,48 @@
+# In /custom_components/ilmaprognoos/entity.py
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import SOURCE_OBSERVATIONS, SOURCE_FORECAST
+
+OBSERVATION_SOURCES = frozenset({SOURCE_OBSERVATIONS})
+FORECAST_SOURCES = frozenset({SOURCE_FORECAST})
+
+
+_NOT_WRITTEN = object()
+
+
+class IlmaprognoosEntity(CoordinatorEntity):
+    """Coordinator entity that only writes its state when what it shows has changed.
+
+    An update is skipped when none of the entity's sources were refreshed,
+    when none of its data keys are in the coordinator's diff, or when its
+    state fingerprint equals the last written one. Skipped writes are
+    counted on the coordinator.
+    """
+
+    # Update sources the entity reads; current values fall back to the forecast, so both by default
+    _sources = frozenset({SOURCE_OBSERVATIONS, SOURCE_FORECAST})
+    # Keys of coordinator data the entity reads (see coordinator.changed_keys); None reads everything
+    _data_keys = None
+    _written = _NOT_WRITTEN
+
+    def _state_fingerprint(self):
+        return (self.available, self.state, self.state_attributes, self.extra_state_attributes)
+
+    def _skip_write(self):
+        coordinator = self.coordinator
+        if not coordinator.last_update_success or self._written is _NOT_WRITTEN: return False
+        if self._sources.isdisjoint(coordinator.updated_sources): return True
+        if self._data_keys is not None and self._data_keys.isdisjoint(coordinator.changed_keys): return True
+        return self._state_fingerprint() == self._written
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self._skip_write():
+            self.coordinator.skipped_writes += 1
+            return
+        # Without data the entity is unavailable and there is nothing to compare the next update with
+        self._written = self._state_fingerprint() if self.coordinator.data is not None else _NOT_WRITTEN
+        self.coordinator.entity_writes += 1
+        super()._handle_coordinator_update()
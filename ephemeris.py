@@ -0,0 +1,57 @@
+# In /custom_components/ilmaprognoos/ephemeris.py
+
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+
+from astral import Observer
+from astral.sun import daylight, elevation
+
+# Days computed ahead of the first query; covers the 10-day meteogram
+EPHEMERIS_HORIZON_DAYS = 12
+
+
+class SunEphemeris:
+    """Daylight intervals of one location.
+
+    Sunrise and sunset are computed once per day over the forecast horizon
+    and is_up becomes a bisect over the cached intervals instead of a full
+    astral computation per call.
+
+    The cache is replaced as one tuple, so the update job in the executor
+    and the weather entity on the event loop can share an instance.
+    """
+
+    def __init__(self, latitude: float, longitude: float, elevation_m: float = 0):
+        self._observer = Observer(latitude, longitude, elevation_m)
+        # (first_day, last_day, starts, ends)
+        self._intervals = None
+
+    def is_up(self, when: datetime) -> bool:
+        """Return True if the sun is above the horizon at the given aware datetime."""
+        ts = when.timestamp()
+        day = datetime.fromtimestamp(ts, timezone.utc).date()
+        intervals = self._intervals
+        # One day of margin on both sides so intervals crossing midnight UTC are known
+        if intervals is None or not intervals[0] < day < intervals[1]:
+            intervals = self._intervals = self._compute(day - timedelta(days=1))
+        _, _, starts, ends = intervals
+        i = bisect_right(starts, ts) - 1
+        return i >= 0 and ts < ends[i]
+
+    def _compute(self, first_day: date) -> tuple:
+        starts = []
+        ends = []
+        for offset in range(EPHEMERIS_HORIZON_DAYS + 2):
+            day = first_day + timedelta(days=offset)
+            try:
+                sunrise, sunset = daylight(self._observer, day, tzinfo=timezone.utc)
+            except ValueError:
+                # Polar day or night: decide the whole day by the sun's elevation at noon
+                noon = datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc)
+                if elevation(self._observer, noon) <= 0:
+                    continue
+                sunrise = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+                sunset = sunrise + timedelta(days=1)
+            starts.append(sunrise.timestamp())
+            ends.append(sunset.timestamp())
+        return first_day, first_day + timedelta(days=EPHEMERIS_HORIZON_DAYS + 1), starts, ends
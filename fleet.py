@@ -0,0 +1,200 @@
+# In /custom_components/ilmaprognoos/fleet.py
+
+import asyncio
+import csv
+import io
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util, slugify
+
+from .catalog import StationCatalog
+from .const import (
+    DOMAIN, CONF_FLEET, CONF_LOCATIONS, FLEET_CONCURRENCY, SCHEDULE_TOLERANCE,
+    FORECAST_ONLY_ID, NO_SECONDARY_ID
+)
+from .coordinator import IlmaprognoosDataUpdateCoordinator, async_remove_stored_payloads
+from .metrics import UpdateMetrics, STAGE_FLEET_ROUND, STAGE_FLEET_LOCATIONS
+
+
+class LocationListError(ValueError):
+    """A line of a fleet's location list that could not be used."""
+
+    def __init__(self, line: int):
+        super().__init__(f"Invalid location on line {line}")
+        self.line = line
+
+
+def parse_locations(text: str, catalog: StationCatalog) -> list:
+    """Parse "name, latitude, longitude[, primary station[, secondary station]]" lines into location data.
+
+    Fields may also be separated by semicolons, with decimal commas. Empty
+    lines and lines starting with # are skipped. A missing station is picked
+    like the config flow suggests it: the richest of the five nearest as
+    primary and the nearest other one as secondary.
+    """
+    locations = []
+    slugs = set()
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"): continue
+        fields = [field.strip() for field in next(csv.reader([line], delimiter=";" if ";" in line else ",", skipinitialspace=True))]
+        try:
+            name, lat_str, lon_str = fields[:3]
+            lat, lon = float(lat_str.replace(',', '.')), float(lon_str.replace(',', '.'))
+        except ValueError as err:
+            raise LocationListError(number) from err
+        slug = slugify(name)
+        if not slug or slug in slugs or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise LocationListError(number)
+        slugs.add(slug)
+
+        primary = fields[3] if len(fields) > 3 else ""
+        secondary = fields[4] if len(fields) > 4 else ""
+        nearest = catalog.nearest(lat, lon, 5)
+        if not primary:
+            primary = max(nearest, key=lambda s: s.field_count).name if nearest else FORECAST_ONLY_ID
+        if primary == FORECAST_ONLY_ID:
+            secondary = NO_SECONDARY_ID
+        elif not secondary:
+            secondary = next((s.name for s in nearest if s.name != primary), NO_SECONDARY_ID)
+        for station in (primary, secondary):
+            if station not in (FORECAST_ONLY_ID, NO_SECONDARY_ID) and station not in catalog:
+                raise LocationListError(number)
+
+        locations.append({
+            "location_name": name, "slug": slug, "coords": f"{lat};{lon}",
+            "primary_station": primary, "primary_wmocode": _wmocode(catalog, primary),
+            "secondary_station": secondary, "secondary_wmocode": _wmocode(catalog, secondary),
+        })
+    if not locations:
+        raise LocationListError(0)
+    return locations
+
+
+def _wmocode(catalog: StationCatalog, name: str) -> str | None:
+    station = catalog.get(name)
+    return station.wmocode if station is not None else None
+
+
+def format_locations(locations: list) -> str:
+    """Return locations as the lines parse_locations reads, with the stations resolved."""
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    for location in locations:
+        lat, lon = location["coords"].split(";")
+        writer.writerow([location["location_name"], lat, lon, location["primary_station"], location["secondary_station"]])
+    return output.getvalue()
+
+
+def fleet_location_ids(entry: ConfigEntry) -> set:
+    """Return the location ids of a fleet entry's configured locations."""
+    return {f"{entry.entry_id}_{location['slug']}" for location in entry.options.get(CONF_LOCATIONS, [])}
+
+
+async def async_remove_locations(hass: HomeAssistant, location_ids) -> None:
+    """Delete the stored payloads and devices of locations removed from a fleet."""
+    registry = dr.async_get(hass)
+    for location_id in location_ids:
+        await async_remove_stored_payloads(hass, location_id)
+        if device := registry.async_get_device(identifiers={(DOMAIN, location_id)}):
+            registry.async_remove_device(device.id)
+
+
+def entry_coordinators(hass: HomeAssistant, entry: ConfigEntry) -> list:
+    """Return the coordinators of a config entry: its own, or one per location of a fleet."""
+    if entry.data.get(CONF_FLEET):
+        return list(hass.data[DOMAIN][entry.entry_id].coordinators.values())
+    return [hass.data[DOMAIN][entry.entry_id]]
+
+
+class IlmaprognoosFleet:
+    """The locations of a fleet entry and the one scheduler that refreshes them.
+
+    Every location has a coordinator without a timer of its own. A round
+    refreshes the locations whose next refresh has come, at most
+    FLEET_CONCURRENCY at once, and plans the next round for the earliest
+    next refresh of any location.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        self.hass = hass
+        self.entry = entry
+        self.name = entry.data.get("location_name", entry.title)
+        self.locations = entry.options.get(CONF_LOCATIONS, [])
+        self.coordinators = {}
+        for location in self.locations:
+            coordinator = IlmaprognoosDataUpdateCoordinator(hass, entry, location)
+            self.coordinators[coordinator.location_id] = coordinator
+
+        self.metrics = UpdateMetrics()
+        self.last_round = None
+        self.next_round = None
+        self._slots = asyncio.Semaphore(FLEET_CONCURRENCY)
+        self._round_lock = asyncio.Lock()
+        self._listeners = []
+        self._unsub_timer = None
+
+    async def _async_each(self, coordinators, call) -> list:
+        async def run(coordinator):
+            async with self._slots:
+                return await call(coordinator)
+        return await asyncio.gather(*(run(coordinator) for coordinator in coordinators))
+
+    async def async_restore(self) -> list:
+        """Restore every location from its stored payloads; return the coordinators that still need a network refresh."""
+        coordinators = list(self.coordinators.values())
+        restored = await self._async_each(coordinators, lambda coordinator: coordinator.async_restore())
+        return [coordinator for coordinator, ok in zip(coordinators, restored) if not ok]
+
+    async def async_refresh(self, coordinators: list | None = None) -> None:
+        """Refresh the given locations, by default the due ones, and plan the next round."""
+        async with self._round_lock:
+            self._cancel_timer()
+            if coordinators is None:
+                due_by = dt_util.utcnow() + SCHEDULE_TOLERANCE
+                coordinators = [
+                    coordinator for coordinator in self.coordinators.values()
+                    if coordinator.next_refresh is None or coordinator.next_refresh <= due_by
+                ]
+            with self.metrics.time(STAGE_FLEET_ROUND):
+                await self._async_each(coordinators, lambda coordinator: coordinator.async_refresh())
+            self.metrics.add(STAGE_FLEET_LOCATIONS, len(coordinators))
+            self.last_round = dt_util.utcnow()
+            self._schedule_next_round()
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    async def async_update_options(self) -> None:
+        """Apply changed intervals and warning levels to every location and refresh them all."""
+        for coordinator in self.coordinators.values():
+            coordinator.async_apply_options()
+        await self.async_refresh()
+
+    def _schedule_next_round(self) -> None:
+        if not self.coordinators: return
+        now = dt_util.utcnow()
+        self.next_round = max(min(coordinator.next_refresh or now for coordinator in self.coordinators.values()), now + SCHEDULE_TOLERANCE)
+        self._unsub_timer = async_call_later(self.hass, (self.next_round - now).total_seconds(), self._async_handle_timer)
+
+    @callback
+    def _async_handle_timer(self, _now) -> None:
+        self._unsub_timer = None
+        self.entry.async_create_background_task(self.hass, self.async_refresh(), f"{DOMAIN}_fleet_{self.entry.entry_id}")
+
+    def _cancel_timer(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def async_shutdown(self) -> None:
+        self._cancel_timer()
+
+    @callback
+    def async_add_listener(self, update_callback):
+        """Call update_callback after every round; returns the function that removes it."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
@@ -0,0 +1,126 @@
+# In /custom_components/ilmaprognoos/forecast.py
+
+from array import array
+from datetime import datetime
+from typing import NamedTuple
+
+
+class HourlyForecast:
+    """Columnar storage for the hourly forecast.
+
+    Numeric values live in typed arrays and condition strings are interned
+    into small code columns, so a forecast of a few hundred hours costs a
+    handful of objects instead of one dict per hour. Indexing or iterating
+    returns lightweight HourView objects that read straight from the columns.
+    """
+
+    __slots__ = (
+        "times", "timestamps", "temperature", "precipitation", "wind_speed",
+        "wind_bearing", "pressure", "_condition", "_condition_text_et",
+        "_wind_bearing_name", "_strings", "_codes",
+    )
+
+    def __init__(self):
+        self.times = []
+        self.timestamps = array("d")
+        self.temperature = array("d")
+        self.precipitation = array("d")
+        self.wind_speed = array("d")
+        self.wind_bearing = array("d")
+        self.pressure = array("d")
+        self._condition = array("H")
+        self._condition_text_et = array("H")
+        self._wind_bearing_name = array("H")
+        self._strings = []
+        self._codes = {}
+
+    def _intern(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def append(self, time: datetime, temperature: float, condition: str, condition_text_et: str,
+               precipitation: float, wind_speed: float, wind_bearing: float, wind_bearing_name: str,
+               pressure: float) -> None:
+        self.times.append(time)
+        self.timestamps.append(time.timestamp())
+        self.temperature.append(temperature)
+        self._condition.append(self._intern(condition))
+        self._condition_text_et.append(self._intern(condition_text_et))
+        self.precipitation.append(precipitation)
+        self.wind_speed.append(wind_speed)
+        self.wind_bearing.append(wind_bearing)
+        self._wind_bearing_name.append(self._intern(wind_bearing_name))
+        self.pressure.append(pressure)
+
+    def condition(self, index: int) -> str:
+        return self._strings[self._condition[index]]
+
+    def condition_text_et(self, index: int) -> str:
+        return self._strings[self._condition_text_et[index]]
+
+    def wind_bearing_name(self, index: int) -> str:
+        return self._strings[self._wind_bearing_name[index]]
+
+    @property
+    def conditions(self) -> list:
+        """The condition of every hour, as interned strings."""
+        strings = self._strings
+        return [strings[code] for code in self._condition]
+
+    @property
+    def condition_texts_et(self) -> list:
+        strings = self._strings
+        return [strings[code] for code in self._condition_text_et]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, index: int) -> "HourView":
+        if index < 0:
+            index += len(self.times)
+        if not 0 <= index < len(self.times):
+            raise IndexError(index)
+        return HourView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.times)):
+            yield HourView(self, index)
+
+
+class HourView:
+    """Read-only view of one hour of a HourlyForecast."""
+
+    __slots__ = ("_forecast", "_index")
+
+    def __init__(self, forecast: HourlyForecast, index: int):
+        self._forecast = forecast
+        self._index = index
+
+    @property
+    def datetime(self) -> datetime: return self._forecast.times[self._index]
+    @property
+    def temperature(self) -> float: return self._forecast.temperature[self._index]
+    @property
+    def condition(self) -> str: return self._forecast.condition(self._index)
+    @property
+    def condition_text_et(self) -> str: return self._forecast.condition_text_et(self._index)
+    @property
+    def precipitation(self) -> float: return self._forecast.precipitation[self._index]
+    @property
+    def wind_speed(self) -> float: return self._forecast.wind_speed[self._index]
+    @property
+    def wind_bearing(self) -> float: return self._forecast.wind_bearing[self._index]
+    @property
+    def wind_bearing_name(self) -> str: return self._forecast.wind_bearing_name(self._index)
+    @property
+    def pressure(self) -> float: return self._forecast.pressure[self._index]
+
+
+class ForecastProducts(NamedTuple):
+    """Everything parsed from one meteogram download."""
+    hourly: HourlyForecast
+    daily: list
+    warnings: list
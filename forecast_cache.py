@@ -0,0 +1,141 @@
+# In /custom_components/ilmaprognoos/forecast_cache.py
+
+from collections import Counter, OrderedDict
+from time import perf_counter
+from typing import NamedTuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+
+from .api import IlmaprognoosEndpoint, SharedFetch
+from .const import (
+    DOMAIN, FORECAST_URL_FORMAT, DATA_FORECAST_CACHE,
+    FORECAST_GRID_STEP, FORECAST_CACHE_SIZE, FORECAST_CACHE_TTL
+)
+from .forecast import ForecastProducts
+
+
+def grid_cell(coords: str) -> str:
+    """Snap "lat;lon" to the forecast grid; unparseable coordinates are their own cell."""
+    try:
+        lat_str, lon_str = coords.replace(',', '.').split(';')
+        lat = round(float(lat_str) / FORECAST_GRID_STEP) * FORECAST_GRID_STEP
+        lon = round(float(lon_str) / FORECAST_GRID_STEP) * FORECAST_GRID_STEP
+    except (AttributeError, ValueError):
+        return coords
+    return f"{lat:.2f};{lon:.2f}"
+
+
+class CachedForecast(NamedTuple):
+    """A cell's forecast as one caller got it."""
+    body: bytes
+    version: int
+    products: ForecastProducts
+    # Bytes downloaded and ms spent parsing for this caller; 0 when it got a result someone else fetched
+    response_bytes: int
+    processing_ms: float
+
+
+def async_get_forecast_cache(hass: HomeAssistant) -> "IlmaprognoosForecastCache":
+    """Return the forecast cache shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_FORECAST_CACHE not in domain_data:
+        domain_data[DATA_FORECAST_CACHE] = IlmaprognoosForecastCache(hass)
+    return domain_data[DATA_FORECAST_CACHE]
+
+
+class ForecastCell:
+    """The meteogram of one grid cell, fetched and parsed once for every entry in it.
+
+    A result younger than FORECAST_CACHE_TTL is returned as is. Otherwise
+    concurrent callers share a single in-flight fetch. A download whose
+    content matches the cached one is not parsed again. The parsed products
+    hold the warnings unfiltered, since each entry applies its own levels.
+    """
+
+    def __init__(self, hass: HomeAssistant, key: str):
+        self.hass = hass
+        self.key = key
+        self.endpoint = IlmaprognoosEndpoint(FORECAST_URL_FORMAT.format(coords=key))
+        self._cached = None
+        self._fetched_at = None
+        self._fetch = SharedFetch(hass)
+
+    def seed(self, body: bytes, products: ForecastProducts, etag: str | None, last_modified: str | None) -> None:
+        """Start an empty cell from a payload an entry restored from disk, so the next fetch can be a 304."""
+        if self._cached is not None: return
+        self._cached = CachedForecast(body, hash(body), products, 0, 0.0)
+        self.endpoint.etag = etag
+        self.endpoint.last_modified = last_modified
+
+    async def async_get(self, parse) -> CachedForecast:
+        """Return the cell's forecast; parse is an async callable turning a body into ForecastProducts."""
+        if self._cached is not None and self._fetched_at is not None and dt_util.utcnow() - self._fetched_at < FORECAST_CACHE_TTL:
+            # Nothing was transferred or processed for this caller
+            return self._cached._replace(response_bytes=0, processing_ms=0.0)
+        leader = not self._fetch.running
+        result = await self._fetch.async_run(lambda: self._async_fetch(parse))
+        return result if leader else result._replace(response_bytes=0, processing_ms=0.0)
+
+    async def _async_fetch(self, parse) -> CachedForecast:
+        session = async_get_clientsession(self.hass)
+        body = await self.endpoint.async_fetch(session, conditional=self._cached is not None)
+        self._fetched_at = dt_util.utcnow()
+        # None means 304 Not Modified
+        if body is None or (self._cached is not None and hash(body) == self._cached.version):
+            return self._cached._replace(response_bytes=self.endpoint.last_response_bytes, processing_ms=0.0)
+        started = perf_counter()
+        try:
+            products = await parse(body)
+        except Exception:
+            # Do not let a 304 pin the cell to a response that could not be processed
+            self.endpoint.reset_validators()
+            raise
+        result = CachedForecast(body, hash(body), products, self.endpoint.last_response_bytes, (perf_counter() - started) * 1000)
+        # An empty forecast goes to the callers, who decide whether to use it, but is not kept for others
+        if products.hourly:
+            self._cached = result
+        else:
+            self.endpoint.reset_validators()
+        return result
+
+
+class IlmaprognoosForecastCache:
+    """Forecast cells keyed by grid-snapped coordinates.
+
+    A cell lives as long as some coordinator holds it, so its validators,
+    circuit breaker and forecast stay with the entries that use them however
+    many cells there are. Of the cells no coordinator holds any more, the
+    FORECAST_CACHE_SIZE most recently released are kept for an entry that is
+    reloaded or added again.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._cells = {}
+        self._holders = Counter()
+        self._released = OrderedDict()
+
+    def acquire(self, coords: str) -> ForecastCell:
+        """Return the cell of the coordinates for a new holder, who has to release it when done."""
+        key = grid_cell(coords)
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._released.pop(key, None) or ForecastCell(self.hass, key)
+            self._cells[key] = cell
+        self._holders[key] += 1
+        return cell
+
+    def release(self, cell: ForecastCell) -> None:
+        """Drop a holder of the cell; the least recently released unheld cells beyond FORECAST_CACHE_SIZE are forgotten."""
+        self._holders[cell.key] -= 1
+        if self._holders[cell.key] > 0: return
+        del self._holders[cell.key]
+        del self._cells[cell.key]
+        self._released[cell.key] = cell
+        while len(self._released) > FORECAST_CACHE_SIZE:
+            self._released.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._cells) + len(self._released)
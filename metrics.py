@@ -0,0 +1,74 @@
+# In /custom_components/ilmaprognoos/metrics.py
+
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+
+# Number of most recent samples the percentiles are computed over
+METRICS_WINDOW = 100
+
+STAGE_FETCH_OBSERVATIONS = "fetch_observations"
+STAGE_FETCH_FORECAST = "fetch_forecast"
+STAGE_OBSERVATIONS_BYTES = "observations_bytes"
+STAGE_FORECAST_BYTES = "forecast_bytes"
+STAGE_XML_PARSE = "xml_parse"
+STAGE_FORECAST_PROCESSING = "forecast_processing"
+STAGE_DERIVED = "derived"
+STAGE_ENTITY_WRITES = "entity_writes"
+STAGE_UPDATE = "update"
+# Time an update held the event loop, i.e. its duration minus everything it awaited
+STAGE_LOOP_BLOCKING = "loop_blocking"
+# A fleet round and the number of locations it refreshed
+STAGE_FLEET_ROUND = "fleet_round"
+STAGE_FLEET_LOCATIONS = "fleet_locations"
+
+
+class RollingStat:
+    """The last METRICS_WINDOW samples of one measurement."""
+
+    __slots__ = ("samples",)
+
+    def __init__(self):
+        self.samples = deque(maxlen=METRICS_WINDOW)
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+
+    @property
+    def last(self) -> float | None:
+        return self.samples[-1] if self.samples else None
+
+    def percentile(self, pct: float) -> float | None:
+        """Nearest-rank percentile of the window."""
+        if not self.samples: return None
+        ordered = sorted(self.samples)
+        return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+    def as_dict(self) -> dict:
+        return {"last": self.last, "p50": self.percentile(50), "p95": self.percentile(95), "samples": len(self.samples)}
+
+
+class UpdateMetrics:
+    """Rolling measurements of the stages of an update, times in milliseconds."""
+
+    def __init__(self):
+        self._stats = {}
+
+    def add(self, stage: str, value: float) -> None:
+        stat = self._stats.get(stage)
+        if stat is None:
+            stat = self._stats[stage] = RollingStat()
+        stat.add(round(value, 2))
+
+    @contextmanager
+    def time(self, stage: str):
+        """Time the block; a block that raises is not recorded."""
+        start = perf_counter()
+        yield
+        self.add(stage, (perf_counter() - start) * 1000)
+
+    def get(self, stage: str) -> RollingStat | None:
+        return self._stats.get(stage)
+
+    def as_dict(self) -> dict:
+        return {stage: stat.as_dict() for stage, stat in self._stats.items()}
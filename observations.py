@@ -0,0 +1,196 @@
+# In /custom_components/ilmaprognoos/observations.py
+
+import io
+from time import perf_counter
+import xml.etree.ElementTree as ET
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+
+from .api import IlmaprognoosEndpoint, SharedFetch
+from .catalog import StationCatalog
+from .metrics import UpdateMetrics, STAGE_FETCH_OBSERVATIONS, STAGE_OBSERVATIONS_BYTES, STAGE_XML_PARSE
+from .conditions import translate_phenomenon
+from .const import (
+    DOMAIN, LOGGER, XML_OBSERVATIONS_URL,
+    DATA_OBSERVATIONS, OBSERVATIONS_CACHE_TTL, STATION_FIELD_MAPPING, CATALOG_TTL
+)
+
+# Reverse lookup so a station element is read in a single pass over its children
+XML_FIELD_KEYS = {xml_key: our_key for our_key, xml_key in STATION_FIELD_MAPPING.items()}
+
+
+def extract_station_data(station_element):
+    data = {}
+    for child in station_element:
+        val = child.text
+        if val is None or val.strip() == "":
+            continue
+        our_key = XML_FIELD_KEYS.get(child.tag)
+        if our_key is not None:
+            try:
+                parsed_val = float(val)
+                if our_key == "sunshineduration":
+                    data[our_key] = round(parsed_val / 60.0, 1)
+                else:
+                    data[our_key] = parsed_val
+            except ValueError:
+                pass
+        elif child.tag == "phenomenon":
+            data["phenomenon"] = translate_phenomenon(val.strip())
+
+    return data
+
+
+def station_hash(station_element):
+    """Hash the raw values of a station element to detect unchanged readings."""
+    return hash(tuple((child.tag, child.text) for child in station_element))
+
+
+def parse_stations(xml_data, names, previous_timestamp=None):
+    """Stream the observations document and read the given stations.
+
+    Returns (timestamp, stations, versions) where stations maps name to data and
+    versions maps name to station_hash. Stations are cleared as soon as they are
+    read and parsing stops once every requested station was found, so the full
+    element tree is never built. If the document carries previous_timestamp it
+    is the same publication and parsing stops right away with stations=None.
+    """
+    wanted = set(names)
+    stations = {}
+    versions = {}
+    try:
+        context = ET.iterparse(io.BytesIO(xml_data), events=("start", "end"))
+        _, root = next(context)
+        timestamp = root.get("timestamp")
+        if timestamp is not None and timestamp == previous_timestamp:
+            return timestamp, None, None
+        if not wanted:
+            return timestamp, stations, versions
+        for event, elem in context:
+            if event != "end" or elem.tag != "station":
+                continue
+            name = elem.findtext("name")
+            if name in wanted:
+                stations[name] = extract_station_data(elem)
+                versions[name] = station_hash(elem)
+                if len(stations) == len(wanted):
+                    break
+            root.clear()
+        return timestamp, stations, versions
+    except Exception as e:
+        LOGGER.warning(f"Failed to parse XML: {e}")
+        return None, {}, {}
+
+
+def _timed_parse_stations(xml_data, names, previous_timestamp=None):
+    """parse_stations for the executor; also returns how long the parse took in ms."""
+    start = perf_counter()
+    result = parse_stations(xml_data, names, previous_timestamp)
+    return result, (perf_counter() - start) * 1000
+
+
+def async_get_observations_hub(hass: HomeAssistant) -> "IlmaprognoosObservationsHub":
+    """Return the observations hub shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_OBSERVATIONS not in domain_data:
+        domain_data[DATA_OBSERVATIONS] = IlmaprognoosObservationsHub(hass)
+    return domain_data[DATA_OBSERVATIONS]
+
+
+class IlmaprognoosObservationsHub:
+    """Fetch and parse the national observations document once for every entry.
+
+    The document is cached for OBSERVATIONS_CACHE_TTL and concurrent callers
+    share a single in-flight fetch. Only the stations of the entries that
+    currently read some are parsed; a station asked for later is parsed from
+    the cached document, and an entry that is unloaded releases its stations.
+
+    The publication timestamp of the document and a hash of every parsed
+    station are kept, so a republished but unchanged document is not parsed
+    again and callers can tell whether their stations changed.
+
+    The station catalog (positions, WMO codes, reported fields) is built
+    from the same document and kept for CATALOG_TTL. Parsing and catalog
+    builds run in the executor.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._document = None
+        self._stations = {}
+        self._versions = {}
+        self.timestamp = None
+        self._parsed_for = frozenset()
+        # Station names each entry or fleet location reads, by its location id
+        self._wanted = {}
+        self._fetched_at = None
+        self._fetch = SharedFetch(hass)
+        self.endpoint = IlmaprognoosEndpoint(XML_OBSERVATIONS_URL)
+        # Fetch and parse costs of the shared document, shown on every entry's status sensor
+        self.metrics = UpdateMetrics()
+        self._catalog = None
+        self._catalog_built_at = None
+
+    async def async_get_stations(self, location_id: str, names) -> dict:
+        """Return the parsed data of the stations a location reads, keyed by name; they replace the ones it read before."""
+        self._wanted[location_id] = frozenset(names)
+        stations = await self._async_get_document()
+        if not self._wanted_names() <= self._parsed_for:
+            stations = await self._async_parse()
+        return {name: stations[name] for name in names if name in stations}
+
+    def release(self, location_id: str) -> None:
+        """Stop parsing the stations of an unloaded location, unless another one reads them."""
+        self._wanted.pop(location_id, None)
+
+    def _wanted_names(self) -> frozenset:
+        return frozenset().union(*self._wanted.values())
+
+    async def async_get_catalog(self) -> StationCatalog:
+        """Return the station catalog, rebuilding it from the current document once it is older than CATALOG_TTL."""
+        if self._catalog is None or dt_util.utcnow() - self._catalog_built_at >= CATALOG_TTL:
+            await self._async_get_document()
+            self._catalog = await self.hass.async_add_executor_job(StationCatalog.from_document, self._document)
+            self._catalog_built_at = dt_util.utcnow()
+        return self._catalog
+
+    def station_versions(self, names) -> tuple:
+        """Return the content hashes of the given stations as last parsed."""
+        return tuple(self._versions.get(name) for name in names)
+
+    async def _async_parse(self, same_publication_ok=False) -> dict:
+        if not self._document:
+            return self._stations
+        # Callers may add stations while the job runs; it parses the set as it was when it started
+        wanted = self._wanted_names()
+        previous = self.timestamp if same_publication_ok and wanted <= self._parsed_for else None
+        (timestamp, stations, versions), elapsed = await self.hass.async_add_executor_job(
+            _timed_parse_stations, self._document, wanted, previous
+        )
+        self.metrics.add(STAGE_XML_PARSE, elapsed)
+        if stations is not None:
+            self._stations, self._versions = stations, versions
+            self._parsed_for = wanted
+        self.timestamp = timestamp
+        return self._stations
+
+    async def _async_get_document(self) -> dict:
+        if self._fetched_at is not None and dt_util.utcnow() - self._fetched_at < OBSERVATIONS_CACHE_TTL:
+            return self._stations
+
+        return await self._fetch.async_run(self._async_fetch)
+
+    async def _async_fetch(self) -> dict:
+        session = async_get_clientsession(self.hass)
+        # The fetch is shared, so the endpoint's own deadline applies rather than any caller's
+        with self.metrics.time(STAGE_FETCH_OBSERVATIONS):
+            xml_data = await self.endpoint.async_fetch(session, conditional=self._fetched_at is not None)
+        self.metrics.add(STAGE_OBSERVATIONS_BYTES, self.endpoint.last_response_bytes)
+        # None means 304 Not Modified: the stations parsed last time are still current
+        if xml_data is not None:
+            self._document = xml_data
+            await self._async_parse(same_publication_ok=True)
+        self._fetched_at = dt_util.utcnow()
+        return self._stations
@@ -0,0 +1,82 @@
+# In /custom_components/ilmaprognoos/scheduler.py
+
+from datetime import datetime, timedelta
+
+# Learned publication periods outside this range are not trusted
+MIN_PERIOD = timedelta(minutes=5)
+MAX_PERIOD = timedelta(hours=6)
+# Weight of the newest observed period in the running estimate
+PERIOD_SMOOTHING = 0.3
+# Fetch this much before the expected publication, so the estimate keeps moving towards the real publication time
+PROBE_LEAD = timedelta(minutes=2)
+# First retry after a fetch that found no new content; doubles with every further unchanged fetch
+RETRY_BASE = timedelta(minutes=2)
+
+
+class PublicationSchedule:
+    """Plans the fetches of one source around when it actually publishes.
+
+    Until two content changes have been seen the source is fetched every
+    configured interval. After that the time between changes is learned as
+    the publication period. The next fetch is planned shortly before the
+    next expected publication. If the source publishes more often than the
+    configured interval, the fetch is planned before a later publication
+    instead. Unchanged content is retried after RETRY_BASE, and the wait
+    doubles with each further retry. It never exceeds the configured
+    interval, so a missed publication is picked up no later than on the
+    fixed schedule.
+    """
+
+    def __init__(self, interval: timedelta):
+        self.interval = interval
+        self.period = None
+        self.last_change = None
+        self.unchanged = 0
+        self.next_fetch = None
+
+    def reset(self) -> None:
+        """Fetch on the next refresh, keeping what was learned."""
+        self.next_fetch = None
+
+    def is_due(self, now: datetime, tolerance: timedelta) -> bool:
+        return self.next_fetch is None or self.next_fetch <= now + tolerance
+
+    def record(self, now: datetime, changed: bool) -> None:
+        """Record the outcome of a fetch and plan the next one."""
+        if changed:
+            if self.last_change is not None:
+                self._learn(now - self.last_change)
+            self.last_change = now
+            self.unchanged = 0
+        else:
+            self.unchanged += 1
+        self.next_fetch = now + self._delay(now)
+
+    def record_failure(self, now: datetime, retry_at: datetime | None = None) -> None:
+        """Plan the next fetch after a failed one; retry_at is when the endpoint accepts requests again."""
+        self.next_fetch = retry_at if retry_at is not None else now + self.interval
+
+    def _learn(self, observed: timedelta) -> None:
+        if not MIN_PERIOD <= observed <= MAX_PERIOD:
+            return
+        if self.period is None:
+            self.period = observed
+        elif observed < self.period * 1.75:
+            # Longer gaps are missed publications rather than a slower cadence
+            self.period += (observed - self.period) * PERIOD_SMOOTHING
+
+    def _delay(self, now: datetime) -> timedelta:
+        if self.period is None:
+            return self.interval
+        if self.unchanged:
+            return min(RETRY_BASE * 2 ** (self.unchanged - 1), self.interval)
+        # A source publishing more often than the configured interval is fetched every few publications
+        publications = max(1, int(self.interval / self.period + 0.5))
+        return max(self.last_change + self.period * publications - PROBE_LEAD - now, RETRY_BASE)
+
+    def as_dict(self) -> dict:
+        return {
+            "period_minutes": None if self.period is None else round(self.period.total_seconds() / 60, 1),
+            "last_change": self.last_change.isoformat() if self.last_change else None,
+            "next_fetch": self.next_fetch.isoformat() if self.next_fetch else None,
+        }
@@ -1,80 +1,156 @@
 # In /custom_components/ilmaprognoos/sensor.py
 
+import asyncio
+
 from homeassistant.components.sensor import (
     SensorEntity, SensorDeviceClass, SensorStateClass
 )
-from homeassistant.const import UnitOfTemperature, PERCENTAGE, UnitOfLength, UnitOfTime, UnitOfPrecipitationDepth
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.const import UnitOfTemperature, PERCENTAGE, UnitOfLength, UnitOfTime, UnitOfPrecipitationDepth, UnitOfInformation, EntityCategory
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import DOMAIN, LOGGER, DATA_HUB_METRIC_SENSORS, SENSOR_RETIRE_AFTER, SENSOR_LAST_SEEN_SAVE_INTERVAL, STORAGE_SENSORS, STORAGE_SAVE_DELAY
+from .coordinator import payload_store
+from .entity import IlmaprognoosEntity, OBSERVATION_SOURCES, FORECAST_SOURCES, _NOT_WRITTEN
+from .fleet import entry_coordinators
+from .metrics import (
+    STAGE_UPDATE, STAGE_FETCH_FORECAST, STAGE_FORECAST_BYTES, STAGE_FORECAST_PROCESSING, STAGE_DERIVED,
+    STAGE_ENTITY_WRITES, STAGE_FETCH_OBSERVATIONS, STAGE_OBSERVATIONS_BYTES, STAGE_XML_PARSE, STAGE_LOOP_BLOCKING
+)
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the sensor platform."""
-    coordinator = hass.data[DOMAIN][entry.entry_id]
-    
-    sensors_to_add = [
-        IlmaprognoosWarningsSensor(coordinator),
-        IlmaprognoosPrecipitationSensor(coordinator),
-        IlmaprognoosTemperatureSensor(coordinator),
-    ]
-
-    if not coordinator.is_forecast_only:
-        sensors_to_add.append(IlmaprognoosHumiditySensor(coordinator))
-        initial_data = coordinator.data.get("current", {})
-        
-        if "wind_speed_max" in initial_data:
-            sensors_to_add.append(IlmaprognoosWindGustSensor(coordinator))
-        if "visibility" in initial_data:
-            sensors_to_add.append(IlmaprognoosVisibilitySensor(coordinator))
-        if "veetase" in initial_data:
-            sensors_to_add.append(IlmaprognoosWaterLevelSensor(coordinator))
-        if "veetase_eh2000" in initial_data:
-            sensors_to_add.append(IlmaprognoosSeaLevelSensor(coordinator))
-        if "veetemp" in initial_data:
-            sensors_to_add.append(IlmaprognoosWaterTempSensor(coordinator))
-        if "uvindex" in initial_data:
-            sensors_to_add.append(IlmaprognoosUVIndexSensor(coordinator))
-        if "sunshineduration" in initial_data:
-            sensors_to_add.append(IlmaprognoosSunshineDurationSensor(coordinator))
-        if "globalradiation" in initial_data:
-            sensors_to_add.append(IlmaprognoosGlobalRadiationSensor(coordinator))
-        if "phenomenon" in initial_data:
-            sensors_to_add.append(IlmaprognoosPhenomenonSensor(coordinator))
-
-    if coordinator.data.get("sunshine"):
+    sensors_to_add = []
+    managers = []
+    for coordinator in entry_coordinators(hass, entry):
         sensors_to_add.extend([
-            SunshineTodaySensor(coordinator),
-            SunshineTomorrowSensor(coordinator),
-            SunshineDay2Sensor(coordinator),
-            SunshineDay3Sensor(coordinator),
+            IlmaprognoosWarningsSensor(coordinator),
+            IlmaprognoosPrecipitationSensor(coordinator),
+            IlmaprognoosTemperatureSensor(coordinator),
         ])
 
-    if coordinator.data.get("precipitation_forecast"):
-        sensors_to_add.extend([
-            PrecipitationTodaySensor(coordinator),
-            PrecipitationTomorrowSensor(coordinator),
-            PrecipitationDay2Sensor(coordinator),
-            PrecipitationDay3Sensor(coordinator),
-        ])
+        if not coordinator.is_forecast_only:
+            sensors_to_add.append(IlmaprognoosHumiditySensor(coordinator))
+
+        # Diagnostic metrics, disabled by default. Fleet locations have none, the fleet's status sensor shows its rounds instead.
+        if not coordinator.in_fleet:
+            sensors_to_add.extend(IlmaprognoosMetricSensor(coordinator, stage, name, unit) for stage, name, unit, shared in METRIC_SENSORS if not shared)
+
+        # Optional sensors follow the data instead of the first fetch, so no reload is needed to recover them
+        managers.append(IlmaprognoosOptionalSensors(hass, coordinator, async_add_entities))
 
+    # The observation stages belong to the shared hub, so one entry at a time has them, on a location that reads stations
+    if carrier := next((coordinator for coordinator in entry_coordinators(hass, entry) if not coordinator.is_forecast_only), None):
+        entry.async_on_unload(_hub_metric_sensors(hass).async_register(entry.entry_id, carrier, async_add_entities))
+
+    await asyncio.gather(*(manager.async_load() for manager in managers))
     async_add_entities(sensors_to_add)
+    for manager in managers:
+        entry.async_on_unload(manager.coordinator.async_add_listener(manager.async_update))
+        manager.async_update()
+
+
+class IlmaprognoosOptionalSensors:
+    """Adds optional sensors once their data appears and retires observation sensors whose field is long gone.
+
+    When each observation field was last seen is stored per location, so a
+    field that stopped being reported before a restart is still retired,
+    also when its sensor was never added again since.
+    """
+
+    def __init__(self, hass, coordinator, async_add_entities):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.async_add_entities = async_add_entities
+        self._entities = {}
+        self._last_seen = {}
+        self._store = payload_store(hass, coordinator.location_id, STORAGE_SENSORS)
+        self._saved_fields = frozenset()
+        self._saved_at = dt_util.utcnow()
 
+    async def async_load(self) -> None:
+        """Restore the stored last seen times; registered sensors of fields without one start counting now."""
+        stored = await self._store.async_load() or {}
+        registry = er.async_get(self.hass)
+        for key in OPTIONAL_OBSERVATION_SENSORS:
+            if last_seen := dt_util.parse_datetime(stored.get(key) or ""):
+                self._last_seen[key] = last_seen
+            elif any(registry.async_get_entity_id("sensor", DOMAIN, unique_id) for unique_id in self._unique_ids(key)):
+                self._last_seen[key] = self._saved_at
+        self._saved_fields = frozenset(key for key in stored if key in self._last_seen)
 
-class IlmaprognoosBaseSensor(CoordinatorEntity, SensorEntity):
+    def _unique_ids(self, key) -> list:
+        return [cls(self.coordinator).unique_id for cls in OPTIONAL_OBSERVATION_SENSORS[key]]
+
+    @callback
+    def async_update(self) -> None:
+        data = self.coordinator.data
+        if data is None: return
+        now = dt_util.utcnow()
+        present = {key for key in OPTIONAL_FORECAST_SENSORS if data.get(key)}
+        if not self.coordinator.is_forecast_only:
+            current = data.get("current", {})
+            present.update(field for field in OPTIONAL_OBSERVATION_SENSORS if field in current)
+
+        new_entities = []
+        for key in (*OPTIONAL_OBSERVATION_SENSORS, *OPTIONAL_FORECAST_SENSORS):
+            if key not in present: continue
+            self._last_seen[key] = now
+            if key not in self._entities:
+                classes = OPTIONAL_OBSERVATION_SENSORS.get(key) or OPTIONAL_FORECAST_SENSORS[key]
+                self._entities[key] = [cls(self.coordinator) for cls in classes]
+                new_entities.extend(self._entities[key])
+        if new_entities:
+            self.async_add_entities(new_entities)
+
+        # Only observation fields are retired; a station that stopped reporting one should not keep a dead sensor
+        registry = er.async_get(self.hass)
+        for key in [key for key in OPTIONAL_OBSERVATION_SENSORS if key in self._last_seen and key not in present]:
+            if now - self._last_seen[key] < SENSOR_RETIRE_AFTER: continue
+            LOGGER.info(f"{self.coordinator.location_name}: '{key}' has not been reported since {self._last_seen[key]}, removing its sensor")
+            for entity in self._entities.pop(key, ()):
+                if entity.registry_entry is None and entity.hass is not None: self.hass.async_create_task(entity.async_remove())
+            # Removing the registry entry also removes a sensor that was not added again after a restart
+            for unique_id in self._unique_ids(key):
+                if entity_id := registry.async_get_entity_id("sensor", DOMAIN, unique_id): registry.async_remove(entity_id)
+            del self._last_seen[key]
+        self._async_save(now)
+
+    def _async_save(self, now) -> None:
+        seen = {key: last_seen for key, last_seen in self._last_seen.items() if key in OPTIONAL_OBSERVATION_SENSORS}
+        if seen.keys() == self._saved_fields and now - self._saved_at < SENSOR_LAST_SEEN_SAVE_INTERVAL: return
+        self._saved_fields, self._saved_at = frozenset(seen), now
+        self._store.async_delay_save(lambda: {key: last_seen.isoformat() for key, last_seen in seen.items()}, STORAGE_SAVE_DELAY)
+
+
+class IlmaprognoosBaseSensor(IlmaprognoosEntity, SensorEntity):
     _attr_has_entity_name = True
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_device_info = { "identifiers": {(DOMAIN, coordinator.config_entry.entry_id)} }
+        super().__init__(coordinator); self._attr_device_info = { "identifiers": {(DOMAIN, coordinator.location_id)}, "name": coordinator.device_name }
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass(); self._handle_coordinator_update()
     @property
     def available(self) -> bool:
         return self.coordinator.data is not None
 
+    # Numeric values are compared at display precision; changes smaller than the deadband are not written
+    _deadband = None
+    def _state_fingerprint(self):
+        value = self.native_value
+        if isinstance(value, (int, float)):
+            if self.suggested_display_precision is not None: value = round(value, self.suggested_display_precision)
+            last = self._written[1] if isinstance(self._written, tuple) else None
+            if self._deadband is not None and isinstance(last, (int, float)) and abs(value - last) < self._deadband: value = last
+        return (self.available, value, self.extra_state_attributes)
+
 
 class IlmaprognoosWarningsSensor(IlmaprognoosBaseSensor):
-    _attr_icon = "mdi:alert-outline"; _attr_name = "Hoiatused"
+    _attr_icon = "mdi:alert-outline"; _attr_name = "Hoiatused"; _sources = FORECAST_SOURCES; _data_keys = frozenset({"warnings"})
+    # Full texts and payloads would be stored again with every warning change; ilmaprognoos.get_warnings returns them on demand
+    _unrecorded_attributes = frozenset({"descriptions", "raw_warnings"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_warnings"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_warnings"
     @property
     def state(self):
         warnings = self.coordinator.data.get("warnings", [])
@@ -99,9 +175,9 @@ class IlmaprognoosWarningsSensor(IlmaprognoosBaseSensor):
 
 
 class IlmaprognoosPrecipitationSensor(IlmaprognoosBaseSensor):
-    _attr_name = "Sademed"; _attr_native_unit_of_measurement = "mm/h"; _attr_icon = "mdi:weather-pouring"; _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_name = "Sademed"; _attr_native_unit_of_measurement = "mm/h"; _attr_icon = "mdi:weather-pouring"; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_suggested_display_precision = 1; _data_keys = frozenset({"current.sademed"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_precipitation"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_precipitation"
     @property
     def native_value(self):
         val = self.coordinator.data.get("current", {}).get("sademed")
@@ -111,16 +187,16 @@ class IlmaprognoosPrecipitationSensor(IlmaprognoosBaseSensor):
         except (ValueError, IndexError): return 0.0
 
 class IlmaprognoosTemperatureSensor(IlmaprognoosBaseSensor):
-    _attr_name = "Temperatuur"; _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS; _attr_device_class = SensorDeviceClass.TEMPERATURE; _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_name = "Temperatuur"; _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS; _attr_device_class = SensorDeviceClass.TEMPERATURE; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_suggested_display_precision = 1; _data_keys = frozenset({"current.temperature"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_temperature"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_temperature"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("temperature")
 
 class IlmaprognoosHumiditySensor(IlmaprognoosBaseSensor):
-    _attr_name = "Õhuniiskus"; _attr_native_unit_of_measurement = PERCENTAGE; _attr_device_class = SensorDeviceClass.HUMIDITY; _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_name = "Õhuniiskus"; _attr_native_unit_of_measurement = PERCENTAGE; _attr_device_class = SensorDeviceClass.HUMIDITY; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_suggested_display_precision = 0; _sources = OBSERVATION_SOURCES; _data_keys = frozenset({"current.ohuniiskus"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_humidity"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_humidity"
     @property
     def native_value(self):
         val = self.coordinator.data.get("current", {}).get("ohuniiskus")
@@ -130,44 +206,44 @@ class IlmaprognoosHumiditySensor(IlmaprognoosBaseSensor):
         except ValueError: return None
 
 class IlmaprognoosWindGustSensor(IlmaprognoosBaseSensor):
-    _attr_name = "Tuulepuhangud"; _attr_native_unit_of_measurement = "m/s"; _attr_icon = "mdi:weather-windy"; _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_name = "Tuulepuhangud"; _attr_native_unit_of_measurement = "m/s"; _attr_icon = "mdi:weather-windy"; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_suggested_display_precision = 1; _sources = OBSERVATION_SOURCES; _data_keys = frozenset({"current.wind_speed_max"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_wind_gusts"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_wind_gusts"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("wind_speed_max")
 
 class IlmaprognoosVisibilitySensor(IlmaprognoosBaseSensor):
-    _attr_name = "Nähtavus"; _attr_native_unit_of_measurement = UnitOfLength.KILOMETERS; _attr_icon = "mdi:eye"; _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_name = "Nähtavus"; _attr_native_unit_of_measurement = UnitOfLength.KILOMETERS; _attr_icon = "mdi:eye"; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_suggested_display_precision = 1; _sources = OBSERVATION_SOURCES; _data_keys = frozenset({"current.visibility"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_visibility"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_visibility"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("visibility")
 
 class IlmaprognoosWaterLevelSensor(IlmaprognoosBaseSensor):
-    _attr_name = "Veetase"; _attr_native_unit_of_measurement = UnitOfLength.CENTIMETERS; _attr_icon = "mdi:waves-arrow-up"; _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_name = "Veetase"; _attr_native_unit_of_measurement = UnitOfLength.CENTIMETERS; _attr_icon = "mdi:waves-arrow-up"; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_suggested_display_precision = 0; _sources = OBSERVATION_SOURCES; _data_keys = frozenset({"current.veetase"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_water_level"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_water_level"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("veetase")
 
 class IlmaprognoosSeaLevelSensor(IlmaprognoosBaseSensor):
-    _attr_name = "Merevee tase"; _attr_native_unit_of_measurement = UnitOfLength.CENTIMETERS; _attr_icon = "mdi:waves-arrow-up"; _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_name = "Merevee tase"; _attr_native_unit_of_measurement = UnitOfLength.CENTIMETERS; _attr_icon = "mdi:waves-arrow-up"; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_suggested_display_precision = 0; _sources = OBSERVATION_SOURCES; _data_keys = frozenset({"current.veetase_eh2000"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_sea_level"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_sea_level"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("veetase_eh2000")
 
 class IlmaprognoosWaterTempSensor(IlmaprognoosBaseSensor):
-    _attr_name = "Veetemperatuur"; _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS; _attr_device_class = SensorDeviceClass.TEMPERATURE; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_icon = "mdi:thermometer-water"
+    _attr_name = "Veetemperatuur"; _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS; _attr_device_class = SensorDeviceClass.TEMPERATURE; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_icon = "mdi:thermometer-water"; _attr_suggested_display_precision = 1; _sources = OBSERVATION_SOURCES; _data_keys = frozenset({"current.veetemp"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_water_temp"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_water_temp"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("veetemp")
 
 class IlmaprognoosUVIndexSensor(IlmaprognoosBaseSensor):
-    _attr_name = "UV-indeks"; _attr_icon = "mdi:weather-sunny-alert"; _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_name = "UV-indeks"; _attr_icon = "mdi:weather-sunny-alert"; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_suggested_display_precision = 1; _sources = OBSERVATION_SOURCES; _data_keys = frozenset({"current.uvindex"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_uvindex"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_uvindex"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("uvindex")
 
@@ -177,15 +253,20 @@ class IlmaprognoosGlobalRadiationSensor(IlmaprognoosBaseSensor):
     _attr_native_unit_of_measurement = "W/m²"
     _attr_device_class = SensorDeviceClass.IRRADIANCE
     _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 0
+    _sources = OBSERVATION_SOURCES
+    _data_keys = frozenset({"current.globalradiation"})
+    # Radiation flickers by a few W/m² between observations under passing clouds
+    _deadband = 5
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_globalradiation"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_globalradiation"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("globalradiation")
 
 class IlmaprognoosPhenomenonSensor(IlmaprognoosBaseSensor):
-    _attr_icon = "mdi:weather-partly-cloudy"; _attr_name = "Ilmastikunähtus"
+    _attr_icon = "mdi:weather-partly-cloudy"; _attr_name = "Ilmastikunähtus"; _data_keys = frozenset({"current.phenomenon"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_phenomenon"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_phenomenon"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("phenomenon")
 
@@ -195,67 +276,175 @@ class IlmaprognoosSunshineDurationSensor(IlmaprognoosBaseSensor):
     _attr_native_unit_of_measurement = UnitOfTime.HOURS
     _attr_icon = "mdi:timer-sand"
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_suggested_display_precision = 1
+    _sources = OBSERVATION_SOURCES
+    _data_keys = frozenset({"current.sunshineduration"})
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_sunshineduration"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_sunshineduration"
     @property
     def native_value(self): return self.coordinator.data.get("current", {}).get("sunshineduration")
 
 
 # --- Forecast Sensors ---
 class IlmaprognoosSunshineSensor(IlmaprognoosBaseSensor):
-    _attr_native_unit_of_measurement = UnitOfTime.HOURS; _attr_icon = "mdi:weather-sunny"; _attr_state_class = SensorStateClass.TOTAL
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS; _attr_icon = "mdi:weather-sunny"; _attr_state_class = SensorStateClass.TOTAL; _attr_suggested_display_precision = 1; _sources = FORECAST_SOURCES; _data_keys = frozenset({"sunshine"})
     @property
     def available(self) -> bool: return super().available and self.coordinator.data.get("sunshine") is not None
 class SunshineTodaySensor(IlmaprognoosSunshineSensor):
     _attr_name = "Päikesepaiste täna"
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_sunshine_today"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_sunshine_today"
     @property
     def native_value(self): return self.coordinator.data.get("sunshine", {}).get("today")
 class SunshineTomorrowSensor(IlmaprognoosSunshineSensor):
     _attr_name = "Päikesepaiste homme"
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_sunshine_tomorrow"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_sunshine_tomorrow"
     @property
     def native_value(self): return self.coordinator.data.get("sunshine", {}).get("tomorrow")
 class SunshineDay2Sensor(IlmaprognoosSunshineSensor):
     _attr_name = "Päikesepaiste (päev 2)"
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_sunshine_day_2"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_sunshine_day_2"
     @property
     def native_value(self): return self.coordinator.data.get("sunshine", {}).get("day_2")
 class SunshineDay3Sensor(IlmaprognoosSunshineSensor):
     _attr_name = "Päikesepaiste (päev 3)"
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_sunshine_day_3"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_sunshine_day_3"
     @property
     def native_value(self): return self.coordinator.data.get("sunshine", {}).get("day_3")
 
 class IlmaprognoosPrecipitationForecastSensor(IlmaprognoosBaseSensor):
-    _attr_native_unit_of_measurement = UnitOfPrecipitationDepth.MILLIMETERS; _attr_icon = "mdi:water-percent"; _attr_state_class = SensorStateClass.TOTAL
+    _attr_native_unit_of_measurement = UnitOfPrecipitationDepth.MILLIMETERS; _attr_icon = "mdi:water-percent"; _attr_state_class = SensorStateClass.TOTAL; _attr_suggested_display_precision = 1; _sources = FORECAST_SOURCES; _data_keys = frozenset({"precipitation_forecast"})
     @property
     def available(self) -> bool: return super().available and self.coordinator.data.get("precipitation_forecast") is not None
 class PrecipitationTodaySensor(IlmaprognoosPrecipitationForecastSensor):
     _attr_name = "Sademed täna"
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_precip_today"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_precip_today"
     @property
     def native_value(self): return self.coordinator.data.get("precipitation_forecast", {}).get("today")
 class PrecipitationTomorrowSensor(IlmaprognoosPrecipitationForecastSensor):
     _attr_name = "Sademed homme"
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_precip_tomorrow"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_precip_tomorrow"
     @property
     def native_value(self): return self.coordinator.data.get("precipitation_forecast", {}).get("tomorrow")
 class PrecipitationDay2Sensor(IlmaprognoosPrecipitationForecastSensor):
     _attr_name = "Sademed (päev 2)"
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_precip_day_2"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_precip_day_2"
     @property
     def native_value(self): return self.coordinator.data.get("precipitation_forecast", {}).get("day_2")
 class PrecipitationDay3Sensor(IlmaprognoosPrecipitationForecastSensor):
     _attr_name = "Sademed (päev 3)"
     def __init__(self, coordinator):
-        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.config_entry.entry_id}_precip_day_3"
+        super().__init__(coordinator); self._attr_unique_id = f"{coordinator.location_id}_precip_day_3"
     @property
     def native_value(self): return self.coordinator.data.get("precipitation_forecast", {}).get("day_3")
+
+
+# --- Diagnostic Sensors ---
+class IlmaprognoosMetricSensor(IlmaprognoosBaseSensor):
+    """Last value of one update stage, with the median and 95th percentile of the recent ones.
+
+    A shared sensor shows a stage of the observations hub; its unique id does not depend on the entry carrying it.
+    """
+    _attr_entity_category = EntityCategory.DIAGNOSTIC; _attr_entity_registry_enabled_default = False; _attr_state_class = SensorStateClass.MEASUREMENT; _attr_icon = "mdi:speedometer"
+    def __init__(self, coordinator, stage, name, unit, shared=False):
+        super().__init__(coordinator); self._stage = stage; self._attr_name = name; self._attr_native_unit_of_measurement = unit
+        self._metrics = coordinator.observations.metrics if shared else coordinator.metrics
+        self._attr_unique_id = f"{DOMAIN}_observations_metric_{stage}" if shared else f"{coordinator.location_id}_metric_{stage}"
+        if unit == UnitOfInformation.BYTES: self._attr_device_class = SensorDeviceClass.DATA_SIZE
+        elif unit == UnitOfTime.MILLISECONDS: self._attr_device_class = SensorDeviceClass.DURATION
+    # Every update produces new measurements, so only the fingerprint decides
+    def _skip_write(self):
+        return self._written is not _NOT_WRITTEN and self._state_fingerprint() == self._written
+    @property
+    def native_value(self):
+        stat = self._metrics.get(self._stage)
+        return None if stat is None else stat.last
+    @property
+    def extra_state_attributes(self):
+        stat = self._metrics.get(self._stage)
+        return None if stat is None else {"p50": stat.percentile(50), "p95": stat.percentile(95)}
+
+
+
+def _hub_metric_sensors(hass) -> "IlmaprognoosHubMetricSensors":
+    """Return the owner of the shared observations hub's metric sensors."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_HUB_METRIC_SENSORS not in domain_data:
+        domain_data[DATA_HUB_METRIC_SENSORS] = IlmaprognoosHubMetricSensors()
+    return domain_data[DATA_HUB_METRIC_SENSORS]
+
+
+class IlmaprognoosHubMetricSensors:
+    """Adds the hub's metric sensors to the first registered entry and hands them over when that entry unloads.
+
+    The entry's platform has removed the sensors by the time its unload callbacks run, so the next entry
+    adds them again under the same unique ids and the entity registry moves them to it.
+    """
+
+    def __init__(self):
+        # Per entry id, the coordinator that can carry the sensors and its platform's async_add_entities
+        self._candidates = {}
+        self._owner = None
+
+    @callback
+    def async_register(self, entry_id, coordinator, async_add_entities):
+        """Offer the entry as carrier; returns the callback that withdraws it."""
+        self._candidates[entry_id] = (coordinator, async_add_entities)
+        if self._owner is None: self._async_hand_over()
+        return lambda: self._async_unregister(entry_id)
+
+    @callback
+    def _async_unregister(self, entry_id):
+        self._candidates.pop(entry_id, None)
+        if self._owner == entry_id:
+            self._owner = None
+            self._async_hand_over()
+
+    @callback
+    def _async_hand_over(self):
+        if not self._candidates: return
+        self._owner, (coordinator, async_add_entities) = next(iter(self._candidates.items()))
+        async_add_entities([
+            IlmaprognoosMetricSensor(coordinator, stage, name, unit, shared=True)
+            for stage, name, unit, shared in METRIC_SENSORS if shared
+        ])
+
+
+# Stage, name, unit and whether the stage is measured by the shared observations hub
+METRIC_SENSORS = (
+    (STAGE_UPDATE, "Uuenduse kestus", UnitOfTime.MILLISECONDS, False),
+    (STAGE_LOOP_BLOCKING, "Sündmustsükli hõivatus uuendusel", UnitOfTime.MILLISECONDS, False),
+    (STAGE_FETCH_FORECAST, "Prognoosi päringu kestus", UnitOfTime.MILLISECONDS, False),
+    (STAGE_FORECAST_BYTES, "Prognoosi vastuse maht", UnitOfInformation.BYTES, False),
+    (STAGE_FORECAST_PROCESSING, "Prognoosi töötlemise kestus", UnitOfTime.MILLISECONDS, False),
+    (STAGE_DERIVED, "Tuletatud väärtuste arvutamise kestus", UnitOfTime.MILLISECONDS, False),
+    (STAGE_ENTITY_WRITES, "Olekute kirjutamisi uuenduse kohta", None, False),
+    (STAGE_FETCH_OBSERVATIONS, "Vaatluste päringu kestus", UnitOfTime.MILLISECONDS, True),
+    (STAGE_OBSERVATIONS_BYTES, "Vaatluste vastuse maht", UnitOfInformation.BYTES, True),
+    (STAGE_XML_PARSE, "Vaatluste XML-i parsimise kestus", UnitOfTime.MILLISECONDS, True),
+)
+
+# Observation fields only some stations report, and the sensors shown for them
+OPTIONAL_OBSERVATION_SENSORS = {
+    "wind_speed_max": (IlmaprognoosWindGustSensor,),
+    "visibility": (IlmaprognoosVisibilitySensor,),
+    "veetase": (IlmaprognoosWaterLevelSensor,),
+    "veetase_eh2000": (IlmaprognoosSeaLevelSensor,),
+    "veetemp": (IlmaprognoosWaterTempSensor,),
+    "uvindex": (IlmaprognoosUVIndexSensor,),
+    "sunshineduration": (IlmaprognoosSunshineDurationSensor,),
+    "globalradiation": (IlmaprognoosGlobalRadiationSensor,),
+    "phenomenon": (IlmaprognoosPhenomenonSensor,),
+}
+
+# Forecast products that can be missing from a partial first download
+OPTIONAL_FORECAST_SENSORS = {
+    "sunshine": (SunshineTodaySensor, SunshineTomorrowSensor, SunshineDay2Sensor, SunshineDay3Sensor),
+    "precipitation_forecast": (PrecipitationTodaySensor, PrecipitationTomorrowSensor, PrecipitationDay2Sensor, PrecipitationDay3Sensor),
+}
@@ -1,5 +1,6 @@
 # In /custom_components/ilmaprognoos/weather.py
 
+from bisect import bisect_left
 from datetime import datetime
 from homeassistant.components.weather import (
     WeatherEntity,
@@ -13,19 +14,21 @@ from homeassistant.const import (
     UnitOfPrecipitationDepth,
     UnitOfLength
 )
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers.sun import is_up
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_change
 from homeassistant.util import dt as dt_util
 
 from .const import DOMAIN, CONF_WARNING_OVERRIDE, DEFAULT_WARNING_OVERRIDE
+from .conditions import classify_condition, classify_warnings
+from .entity import IlmaprognoosEntity, _NOT_WRITTEN
+from .fleet import entry_coordinators
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the weather platform."""
-    coordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([IlmaprognoosWeather(coordinator)])
+    async_add_entities([IlmaprognoosWeather(coordinator) for coordinator in entry_coordinators(hass, entry)])
 
 
-class IlmaprognoosWeather(CoordinatorEntity, WeatherEntity):
+class IlmaprognoosWeather(IlmaprognoosEntity, WeatherEntity):
     """Representation of a weather entity for Ilmaprognoos."""
     _attr_has_entity_name = True
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
@@ -37,14 +40,14 @@ class IlmaprognoosWeather(CoordinatorEntity, WeatherEntity):
 
     def __init__(self, coordinator):
         super().__init__(coordinator)
-        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_weather"
+        self._attr_unique_id = f"{coordinator.location_id}_weather"
         
-        coords = coordinator.config_entry.data.get("coords")
+        coords = coordinator.coords
         config_url = f"https://www.ilmateenistus.ee/ilm/prognoosid/asukoha-prognoos/?coordinates={coords}" if coords else "https://www.ilmateenistus.ee"
 
         self._attr_device_info = {
-            "identifiers": {(DOMAIN, coordinator.config_entry.entry_id)},
-            "name": coordinator.config_entry.title,
+            "identifiers": {(DOMAIN, coordinator.location_id)},
+            "name": coordinator.device_name,
             "manufacturer": "Ilmaprognoos",
             "entry_type": "service",
             "model": "Keskkonnaagentuur & ilmateenistus.ee",
@@ -52,66 +55,55 @@ class IlmaprognoosWeather(CoordinatorEntity, WeatherEntity):
         }
         self._attr_supported_features = (WeatherEntityFeature.FORECAST_DAILY | WeatherEntityFeature.FORECAST_HOURLY)
 
+        # Forecast output cache, rebuilt only when its inputs change
+        self._daily_source = None
+        self._hourly_source = None
+        self._hourly_from = None
+        self._forecast_daily = []
+        self._forecast_hourly = []
+        self._async_refresh_condition()
+
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
+        # The hourly forecast drops the past hour at every hour boundary
+        self.async_on_remove(async_track_time_change(self.hass, self._async_hour_changed, minute=0, second=0))
         self._handle_coordinator_update()
 
     def _get_sun_aware_condition(self, condition: str, timestamp: datetime) -> str:
-        if condition == "clear": return "sunny" if is_up(self.hass, timestamp) else "clear-night"
+        if condition == "clear": return "sunny" if self.coordinator.ephemeris.is_up(timestamp) else "clear-night"
         return condition
 
-    def _map_xml_condition(self, condition_text):
-        cond = condition_text.lower()
-        if "clear" in cond: return "clear"
-        if "few clouds" in cond or "variable clouds" in cond or "cloudy with clear spells" in cond: return "partlycloudy"
-        if "overcast" in cond: return "cloudy"
-        if "snow" in cond or "snowfall" in cond: return "snowy"
-        if "shower" in cond and "snow" not in cond: return "pouring" if "heavy" in cond else "rainy"
-        if "rain" in cond: return "pouring" if "heavy" in cond else "rainy"
-        if "glaze" in cond or "sleet" in cond: return "snowy-rainy"
-        if "hail" in cond: return "hail"
-        if "mist" in cond or "fog" in cond: return "fog"
-        return "cloudy"
-
     @property
     def name(self): return "Ilm"
 
     @property
-    def condition(self):
+    def available(self) -> bool: return super().available and self.coordinator.data is not None
+
+    @callback
+    def _async_refresh_condition(self) -> None:
+        """Precompute everything the condition property needs from the current coordinator data."""
+        self._warning_condition = self._phenomenon_condition = None
+        # A fleet location that has not got any data yet
+        if self.coordinator.data is None: return
         use_warning_override = self.coordinator.config_entry.options.get(CONF_WARNING_OVERRIDE, DEFAULT_WARNING_OVERRIDE)
         warnings = self.coordinator.data.get("warnings",[])
-        
-        # --- FIX: Safe string parsing for warning types in English or Estonian ---
-        if use_warning_override and warnings:
-            for w in warnings:
-                w_type = (w.get("warningEng") or w.get("name") or w.get("x-warning-id") or "").lower()
-                if "thunderstorm" in w_type or "äike" in w_type: return "lightning-rainy"
-            for w in warnings:
-                w_type = (w.get("warningEng") or w.get("name") or w.get("x-warning-id") or "").lower()
-                if "snow" in w_type or "blizzard" in w_type or "lumi" in w_type or "tuisk" in w_type: return "snowy"
-                if "sleet" in w_type or "freezing_rain" in w_type or "lörts" in w_type or "jäide" in w_type: return "snowy-rainy"
-            for w in warnings:
-                w_type = (w.get("warningEng") or w.get("name") or w.get("x-warning-id") or "").lower()
-                if "rain" in w_type or "vihm" in w_type or "sadu" in w_type: return "rainy"
-                if "wind" in w_type or "tuul" in w_type: return "windy"
-                if "fog" in w_type or "udu" in w_type: return "fog"
+        self._warning_condition = classify_warnings(warnings) if use_warning_override and warnings else None
 
         current_phenomenon = self.coordinator.data.get("current", {}).get("phenomenon")
-        if current_phenomenon:
-            mapped_condition = self._map_xml_condition(current_phenomenon)
-            return self._get_sun_aware_condition(mapped_condition, dt_util.now())
+        self._phenomenon_condition = classify_condition(current_phenomenon) if current_phenomenon else None
+
+    @property
+    def condition(self):
+        if self._warning_condition: return self._warning_condition
+        if self._phenomenon_condition: return self._get_sun_aware_condition(self._phenomenon_condition, dt_util.now())
 
         hourly_forecast = self.coordinator.data.get("hourly",[])
         if hourly_forecast:
             now = dt_util.now()
-            for hour in hourly_forecast:
-                try:
-                    forecast_time = dt_util.as_local(datetime.fromisoformat(hour["datetime"]))
-                    if forecast_time >= now: return self._get_sun_aware_condition(hour.get("condition"), forecast_time)
-                except (ValueError, KeyError): continue
-            if hourly_forecast:
-                last_forecast_time = dt_util.as_local(datetime.fromisoformat(hourly_forecast[-1]["datetime"]))
-                return self._get_sun_aware_condition(hourly_forecast[-1].get("condition"), last_forecast_time)
+            # First hour starting at or after now, or the last hour if the forecast ran out
+            index = min(bisect_left(hourly_forecast.timestamps, now.timestamp()), len(hourly_forecast) - 1)
+            hour = hourly_forecast[index]
+            return self._get_sun_aware_condition(hour.condition, hour.datetime)
 
         daily_forecast = self.coordinator.data.get("daily",[])
         if daily_forecast: return self._get_sun_aware_condition(daily_forecast[0].get("condition"), dt_util.now())
@@ -175,15 +167,63 @@ class IlmaprognoosWeather(CoordinatorEntity, WeatherEntity):
         try: return float(str(val).split(" ")[0])
         except (ValueError, IndexError): return 0.0
 
-    async def async_forecast_daily(self) -> list[Forecast] | None:
+    # The condition also depends on the time of day (sun-aware, current forecast hour), not only on the data,
+    # so an update that changed no data the entity reads is still written when the condition moved on
+    def _skip_write(self):
+        return super()._skip_write() and self._written is not _NOT_WRITTEN and self._written[1] == self.state
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._async_refresh_condition()
+        super()._handle_coordinator_update()
+        self._async_refresh_forecasts()
+
+    @callback
+    def _async_hour_changed(self, now: datetime) -> None:
+        self._async_refresh_forecasts()
+        # A new hour may bring a new forecast condition, and sunrise or sunset may have passed since the last write
+        if self._written is not _NOT_WRITTEN and self._written[1] != self.state:
+            self._written = self._state_fingerprint()
+            self.async_write_ha_state()
+
+    @callback
+    def _async_refresh_forecasts(self) -> None:
+        """Rebuild the cached forecast lists whose inputs changed and notify subscribers of real changes.
+
+        Daily output depends only on the coordinator's daily list, hourly output
+        on the hourly forecast and the current hour. Both lists are reused by
+        the coordinator until a new forecast is downloaded, so an identity check
+        is enough to tell whether a rebuild is needed.
+        """
+        if self.coordinator.data is None: return
+        changed = []
         daily_data = self.coordinator.data.get("daily")
+        if daily_data is not self._daily_source:
+            self._daily_source = daily_data
+            forecast = self._build_forecast_daily(daily_data)
+            if forecast != self._forecast_daily:
+                self._forecast_daily = forecast
+                changed.append("daily")
+
+        hourly_data = self.coordinator.data.get("hourly")
+        current_hour = dt_util.now().replace(minute=0, second=0, microsecond=0)
+        if hourly_data is not self._hourly_source or current_hour != self._hourly_from:
+            self._hourly_source = hourly_data
+            self._hourly_from = current_hour
+            forecast = self._build_forecast_hourly(hourly_data, current_hour)
+            if forecast != self._forecast_hourly:
+                self._forecast_hourly = forecast
+                changed.append("hourly")
+
+        if changed and self.hass is not None:
+            self.hass.async_create_task(self.async_update_listeners(changed))
+
+    def _build_forecast_daily(self, daily_data) -> list[Forecast]:
         if not daily_data: return []
         result_list = list()
         for item in daily_data:
             try:
-                forecast_date = dt_util.parse_date(item.get("datetime"))
-                if not forecast_date: continue
-                forecast_time = dt_util.as_local(datetime.combine(forecast_date, datetime.min.time()))
+                forecast_time = item["datetime"]
                 day_data = dict()
                 day_data["datetime"] = forecast_time.isoformat() 
                 day_data["native_temperature"] = item.get("temperature")
@@ -194,27 +234,32 @@ class IlmaprognoosWeather(CoordinatorEntity, WeatherEntity):
             except Exception: continue
         return result_list
 
-    async def async_forecast_hourly(self) -> list[Forecast] | None:
-        hourly_data = self.coordinator.data.get("hourly")
+    def _build_forecast_hourly(self, hourly_data, current_hour: datetime) -> list[Forecast]:
         if not hourly_data: return []
         result_list = list()
-        now = dt_util.now()
-        current_hour = now.replace(minute=0, second=0, microsecond=0)
-        for item in hourly_data:
+        # Hours are chronological, so past hours are skipped with a bisect on the timestamp column
+        first = bisect_left(hourly_data.timestamps, current_hour.timestamp())
+        for index in range(first, len(hourly_data)):
             try:
-                dt_str = item.get("datetime")
-                if not dt_str: continue
-                f_time = dt_util.as_local(datetime.fromisoformat(dt_str))
-                if f_time < current_hour: continue
+                item = hourly_data[index]
+                f_time = item.datetime
                 
                 hour_data = dict()
                 hour_data["datetime"] = f_time.isoformat()
-                hour_data["native_temperature"] = item.get("temperature")
-                hour_data["condition"] = self._get_sun_aware_condition(item.get("condition"), f_time)
-                hour_data["native_precipitation"] = item.get("precipitation")
-                hour_data["native_wind_speed"] = item.get("wind_speed")
-                hour_data["wind_bearing"] = item.get("wind_bearing")
-                hour_data["native_pressure"] = item.get("pressure")
+                hour_data["native_temperature"] = item.temperature
+                hour_data["condition"] = self._get_sun_aware_condition(item.condition, f_time)
+                hour_data["native_precipitation"] = item.precipitation
+                hour_data["native_wind_speed"] = item.wind_speed
+                hour_data["wind_bearing"] = item.wind_bearing
+                hour_data["native_pressure"] = item.pressure
                 result_list.append(hour_data)
             except Exception: continue
         return result_list
+
+    async def async_forecast_daily(self) -> list[Forecast] | None:
+        self._async_refresh_forecasts()
+        return self._forecast_daily
+
+    async def async_forecast_hourly(self) -> list[Forecast] | None:
+        self._async_refresh_forecasts()
+        return self._forecast_hourly